@@ -0,0 +1,183 @@
+"""Compare the ways a merged product list can leave the API.
+
+Product rows come from the saved fixture pages (``extract_html`` +
+``to_products``), repeated up to each size. Two sections:
+
+- ``encode``: encoding alone, per response. ``response_model`` is what the
+  routes used to do on every request (validate into ``List[Product]``, then
+  dump); ``stdlib_json`` skips validation only; ``orjson_rows`` and
+  ``orjson_columns`` are the current ``format=rows`` / ``format=columns``.
+  Sizes are given raw and gzipped at COMPRESS_LEVEL.
+- ``api``: the same merged search through the ASGI app (all middleware,
+  gzip included), every site answered from the cache. ``response_model`` is
+  a route in the old style; ``rows`` / ``columns`` return
+  ``ProductsResponse``. Each with and without ``Accept-Encoding: gzip``.
+
+    python -m backend.benchmarks.bench_encode [--sizes 50 200 1000] [--repeat 200] [--out encode.json]
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+from backend.benchmarks.fixture_server import FIXTURES
+
+SITES = ("amazon", "flipkart", "jiomart", "croma")
+
+
+def _rows(size: int) -> List[Dict[str, Any]]:
+    from backend.scrapers.extract import extract_html, to_products
+    from backend.scrapers import amazon, croma, flipkart, jiomart
+
+    base: List[Dict[str, Any]] = []
+    for module in (amazon, flipkart, jiomart, croma):
+        html = (FIXTURES / f"{module.CARDS.site}.html").read_text()
+        base.extend(to_products(extract_html(html, module.CARDS), module.CARDS, "https://bench"))
+    out = []
+    for i in range(size):
+        row = dict(base[i % len(base)])
+        row["id"] = f"{row['id']}-{i}"
+        out.append(row)
+    return out
+
+
+def _timed(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    ordered = sorted(timings)
+    return {
+        "p50_us": round(statistics.median(ordered) * 1e6, 1),
+        "p95_us": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1e6, 1),
+    }
+
+
+# ------------------------------------- #
+def bench_encode(sizes: List[int], repeat: int) -> Dict[str, Any]:
+    from pydantic import TypeAdapter
+    from backend.models.product import Product
+    from backend.services.encode import COMPRESS_LEVEL, encode_products
+
+    products = TypeAdapter(List[Product])
+    methods: Dict[str, Callable[[List[Dict[str, Any]]], bytes]] = {
+        "response_model": lambda rows: products.dump_json(products.validate_python(rows)),
+        "stdlib_json": lambda rows: json.dumps(rows).encode(),
+        "orjson_rows": lambda rows: encode_products(rows),
+        "orjson_columns": lambda rows: encode_products(rows, "columns"),
+    }
+    out: Dict[str, Any] = {}
+    for size in sizes:
+        rows = _rows(size)
+        per_size = {}
+        for name, method in methods.items():
+            body = method(rows)
+            packed = gzip.compress(body, COMPRESS_LEVEL)
+            per_size[name] = {
+                **_timed(lambda: method(rows), repeat),
+                "bytes": len(body),
+                "gzip_bytes": len(packed),
+                "gzip_us": _timed(lambda: gzip.compress(body, COMPRESS_LEVEL), max(1, repeat // 4))["p50_us"],
+            }
+        out[str(size)] = per_size
+    return out
+
+
+def bench_api(sizes: List[int], repeat: int) -> Dict[str, Any]:
+    import httpx
+    from fastapi import Query
+    from backend.models.product import Product
+    from backend.scrapers import registry
+    from backend.services.cache import result_cache
+    from backend.services.encode import ProductsResponse
+    from backend.services.search import gather_sites, merge_products
+    import backend.main as api
+
+    async def merged(q: str, sites: List[str]) -> List[Dict[str, Any]]:
+        return merge_products(await gather_sites(sites, api._text_call(q), cache=result_cache, query=q))
+
+    # The old response path: FastAPI validates and serializes the list.
+    @api.app.get("/bench/response_model", response_model=List[Product])
+    async def legacy_search(q: str = Query(...), sites: List[str] = Query(...)):
+        return await merged(q, sites)
+
+    @api.app.get("/bench/products")
+    async def fast_search(q: str = Query(...), sites: List[str] = Query(...), format: str = "rows"):
+        return ProductsResponse(await merged(q, sites), format)
+
+    async def measure(path: str, params: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            resp = await client.get(path, params=params, headers=headers)
+            resp.raise_for_status()
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                await client.get(path, params=params, headers=headers)
+                timings.append(time.perf_counter() - started)
+        return {
+            "p50_ms": round(statistics.median(timings) * 1000, 3),
+            "wire_bytes": int(resp.headers.get("content-length", len(resp.content))),
+        }
+
+    async def run() -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for size in sizes:
+            rows = _rows(size)
+            per_site = max(1, size // len(SITES))
+            for i, site in enumerate(SITES):
+                chunk = rows[i * per_site:(i + 1) * per_site] if i < len(SITES) - 1 else rows[i * per_site:]
+                registry.register(f"bench-{site}", type(f"Bench{site}", (), {"search": lambda self, q, c=chunk: c}))
+            params = {"q": f"bench {size}", "sites": [f"bench-{s}" for s in SITES]}
+            for site in params["sites"]:
+                result_cache.set(params["q"], site, registry.get_scraper(site).search(params["q"]))
+            per_size = {}
+            for encoding in ("identity", "gzip"):
+                headers = {"Accept-Encoding": encoding}
+                per_size[f"response_model/{encoding}"] = await measure("/bench/response_model", params, headers)
+                for fmt in ("rows", "columns"):
+                    per_size[f"{fmt}/{encoding}"] = await measure(
+                        "/bench/products", {**params, "format": fmt}, headers,
+                    )
+            out[str(size)] = per_size
+        return out
+
+    return asyncio.run(run())
+
+
+def run(sizes: List[int], repeat: int) -> Dict[str, Any]:
+    scratch = tempfile.mkdtemp(prefix="bench-")
+    os.environ.setdefault("SCRAPERAPI_KEY", "offline")
+    os.environ["CACHE_PATH"] = str(Path(scratch) / "results.sqlite3")
+    os.environ["HISTORY_PATH"] = str(Path(scratch) / "history.sqlite3")
+    os.environ["PREFETCH"] = "0"
+    logging.basicConfig(level=logging.WARNING)
+    return {
+        "benchmark": "encode",
+        "sizes": sizes,
+        "repeat": repeat,
+        "encode": bench_encode(sizes, repeat),
+        "api": bench_api(sizes, max(1, repeat // 4)),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--repeat", type=int, default=200, help="encodes per method and size")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+    report = json.dumps(run(args.sizes, args.repeat), indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(report + "\n")
+    print(report)
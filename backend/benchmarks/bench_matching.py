@@ -0,0 +1,99 @@
+"""Time cross-site grouping on synthetic result sets.
+
+Each result also counts ``mixed_groups``: groups holding listings of more
+than one generated model or storage size (e.g. iPhone 15 with 15 Pro).
+``--check`` exits 1 if any size has one.
+
+    python -m backend.benchmarks.bench_matching [--sizes 100 300 600] [--out matching.json] [--check]
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Tuple
+import argparse
+import json
+import random
+import statistics
+import time
+
+from backend.services.matching import group_products
+
+SITES = ("amazon", "flipkart", "jiomart", "croma")
+MODELS = [
+    ("Apple", "iPhone 15"), ("Apple", "iPhone 15 Plus"), ("Apple", "iPhone 15 Pro"),
+    ("Samsung", "Galaxy S24"), ("Samsung", "Galaxy M35 5G"), ("Samsung", "Galaxy A55 5G"),
+    ("OnePlus", "12R"), ("OnePlus", "Nord CE4"), ("Xiaomi", "Redmi Note 13 Pro"),
+    ("Google", "Pixel 8"), ("Motorola", "Edge 50 Fusion"), ("Realme", "Narzo 70 Pro 5G"),
+    ("Vivo", "T3 5G"), ("iQOO", "Z9 5G"), ("Nothing", "Phone (2a)"), ("Sony", "Bravia 2"),
+    ("LG", "OLED evo C4"), ("Lenovo", "IdeaPad Slim 3"), ("HP", "Victus 15"), ("Dell", "Inspiron 3520"),
+]
+STORAGE = ("64 GB", "128 GB", "256 GB", "512 GB", "1 TB")
+COLOURS = ("Black", "Blue", "Green", "White", "Silver", "Titanium Grey")
+TEMPLATES = (
+    "{brand} {model} ({storage}) - {colour}",
+    "{BRAND} {model} ({colour}, {storage})",
+    "{brand} {model} {storage_compact} {colour}",
+    "{brand} {model} 5G Smartphone with {storage} Storage, {colour}",
+)
+
+
+def listings(n: int, seed: int = 1) -> List[Dict[str, Any]]:
+    return labelled(n, seed)[0]
+
+
+def labelled(n: int, seed: int = 1) -> Tuple[List[Dict[str, Any]], Dict[str, Tuple[str, str]]]:
+    """Listings plus the (model, storage) each listing id was generated from."""
+    rng = random.Random(seed)
+    out = []
+    truth = {}
+    for i in range(n):
+        brand, model = rng.choice(MODELS)
+        storage = rng.choice(STORAGE)
+        name = rng.choice(TEMPLATES).format(
+            brand=brand, BRAND=brand.upper(), model=model, storage=storage,
+            storage_compact=storage.replace(" ", ""), colour=rng.choice(COLOURS),
+        )
+        site = SITES[i % len(SITES)]
+        out.append({
+            "id": f"{site}-{i}", "name": name, "price": float(rng.randint(9_999, 149_999)),
+            "rating": 0.0, "reviews": 0, "imageUrl": "", "url": "", "site": site,
+            "availability": "in-stock",
+        })
+        truth[f"{site}-{i}"] = (model, storage)
+    return out, truth
+
+
+def run(sizes: List[int], repeat: int) -> Dict[str, Any]:
+    results = []
+    for n in sizes:
+        products, truth = labelled(n)
+        group_products(products)  # warm-up
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            groups = group_products(products)
+            timings.append(time.perf_counter() - started)
+        results.append({
+            "listings": n,
+            "groups": len(groups),
+            "multi_site_groups": sum(1 for g in groups if len(g["sites"]) > 1),
+            "mixed_groups": sum(1 for g in groups if len({truth[o["id"]] for o in g["offers"]}) > 1),
+            "median_ms": round(statistics.median(timings) * 1000, 3),
+            "max_ms": round(max(timings) * 1000, 3),
+        })
+    return {"benchmark": "matching", "repeat": repeat, "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 300, 600])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--out")
+    parser.add_argument("--check", action="store_true", help="exit 1 if any group mixes models")
+    args = parser.parse_args()
+    result = run(args.sizes, args.repeat)
+    report = json.dumps(result, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(report + "\n")
+    print(report)
+    if args.check and any(r["mixed_groups"] for r in result["results"]):
+        raise SystemExit(1)
@@ -0,0 +1,207 @@
+"""Benchmark every scraper and /api/search against the saved fixture pages.
+
+Three sections, written as one JSON report:
+
+- ``parse``: extract_html + to_products over each fixture, no I/O.
+- ``scrapers``: ``scraper.search`` end to end through the fixture server at
+  several concurrency levels (latency, cards/s, peak Python heap).
+- ``api``: concurrent GET /api/search through the ASGI app, cold (distinct
+  queries, ``fresh=true``) and cached (one repeated query).
+
+Amazon and Flipkart use ``--engine`` (default ``http``); JioMart and Croma
+render with JavaScript and always need Chrome. A site that cannot run here
+is reported with its error instead of aborting the run.
+
+    python -m backend.benchmarks.bench_scrapers [--sites amazon flipkart] [--levels 1 4 8] [--out scrapers.json]
+"""
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from backend.benchmarks.fixture_server import FIXTURES, serving
+
+SITES = ("amazon", "flipkart", "jiomart", "croma")
+HTTP_CAPABLE = ("amazon", "flipkart")
+
+
+def _latency(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    p95 = statistics.quantiles(ordered, n=20, method="inclusive")[18] if len(ordered) > 1 else ordered[0]
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def _peak_kib(fn: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+
+# ------------------------------------- #
+def bench_parse(sites: List[str], repeat: int) -> Dict[str, Any]:
+    from backend.scrapers.extract import extract_html, to_products
+    from backend.scrapers import amazon, croma, flipkart, jiomart
+
+    specs = {m.CARDS.site: m.CARDS for m in (amazon, flipkart, jiomart, croma)}
+    out = {}
+    for site in sites:
+        html = (FIXTURES / f"{site}.html").read_text()
+        spec = specs[site]
+
+        def parse() -> int:
+            return len(to_products(extract_html(html, spec), spec, "https://bench"))
+
+        cards = parse()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            parse()
+            timings.append(time.perf_counter() - started)
+        out[site] = {
+            "cards": cards,
+            "page_kib": round(len(html.encode()) / 1024, 1),
+            **_latency(timings),
+            "cards_per_s": round(cards * repeat / sum(timings)),
+            "peak_kib": _peak_kib(parse),
+        }
+    return out
+
+
+def bench_scrapers(sites: List[str], levels: List[int], rounds: int) -> Dict[str, Any]:
+    from backend.scrapers import registry
+
+    out: Dict[str, Any] = {}
+    for site in sites:
+        try:
+            scraper = registry.get_scraper(site)
+            scraper.search("phone")  # warm-up: pool, client, first page
+        except Exception as err:
+            out[site] = {"error": f"{type(err).__name__}: {str(err).strip()}"}
+            continue
+
+        runs = []
+        for level in levels:
+            def one(i: int):
+                started = time.perf_counter()
+                cards = len(scraper.search(f"phone {i}"))
+                return time.perf_counter() - started, cards
+
+            def load():
+                with ThreadPoolExecutor(max_workers=level) as pool:
+                    return list(pool.map(one, range(level * rounds)))
+
+            started = time.perf_counter()
+            samples = load()
+            wall = time.perf_counter() - started
+            runs.append({
+                "concurrency": level,
+                "requests": len(samples),
+                **_latency([s for s, _ in samples]),
+                "requests_per_s": round(len(samples) / wall, 1),
+                "cards_per_s": round(sum(c for _, c in samples) / wall),
+                "peak_kib": _peak_kib(load),
+            })
+        out[site] = {"runs": runs}
+    return out
+
+
+async def _api_load(app, sites: List[str], levels: List[int], rounds: int) -> Dict[str, Any]:
+    import httpx
+
+    params = [("sites", s) for s in sites]
+    out: Dict[str, Any] = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for mode in ("cold", "cached"):
+            runs = []
+            for level in levels:
+                async def one(i: int) -> float:
+                    query = [("q", f"phone {level}-{i}"), ("fresh", "true")] if mode == "cold" else [("q", "phone")]
+                    started = time.perf_counter()
+                    resp = await client.get("/api/search", params=query + params)
+                    resp.raise_for_status()
+                    return time.perf_counter() - started
+
+                if mode == "cached":
+                    await one(0)
+                started = time.perf_counter()
+                samples: List[float] = []
+                for _ in range(rounds):
+                    samples += await asyncio.gather(*(one(i) for i in range(level)))
+                wall = time.perf_counter() - started
+                runs.append({
+                    "concurrency": level,
+                    "requests": len(samples),
+                    **_latency(samples),
+                    "requests_per_s": round(len(samples) / wall, 1),
+                })
+            out[mode] = runs
+    return out
+
+
+def bench_api(sites: List[str], levels: List[int], rounds: int) -> Dict[str, Any]:
+    if not sites:
+        return {"error": "no site could be scraped offline"}
+    from backend.main import app
+
+    logging.getLogger().setLevel(logging.WARNING)
+    return {"sites": sites, **asyncio.run(_api_load(app, sites, levels, rounds))}
+
+
+# ------------------------------------- #
+def run(sites: List[str], levels: List[int], rounds: int, repeat: int, engine: str) -> Dict[str, Any]:
+    scratch = tempfile.mkdtemp(prefix="bench-")
+    # Isolate the caches and history from the real ones; never throttle.
+    os.environ.setdefault("SCRAPERAPI_KEY", "offline")
+    os.environ["CACHE_PATH"] = str(Path(scratch) / "results.sqlite3")
+    os.environ["HISTORY_PATH"] = str(Path(scratch) / "history.sqlite3")
+    for site in SITES:
+        os.environ[f"RATE_LIMIT_{site.upper()}"] = ""
+    for site in HTTP_CAPABLE:
+        os.environ[f"SCRAPER_ENGINE_{site.upper()}"] = engine
+    logging.basicConfig(level=logging.WARNING)
+
+    with serving():
+        scrapers = bench_scrapers(sites, levels, rounds)
+        working = [s for s in sites if "runs" in scrapers[s]]
+        api = bench_api(working, levels, rounds)
+    return {
+        "benchmark": "scrapers",
+        "engine": engine,
+        "levels": levels,
+        "rounds": rounds,
+        "parse": bench_parse(sites, repeat),
+        "scrapers": scrapers,
+        "api": api,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sites", nargs="+", choices=SITES, default=list(SITES))
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--rounds", type=int, default=5, help="requests per worker at each level")
+    parser.add_argument("--repeat", type=int, default=200, help="parse iterations per fixture")
+    parser.add_argument("--engine", choices=("http", "selenium", "auto"), default="http")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+    report = json.dumps(run(args.sites, args.levels, args.rounds, args.repeat, args.engine), indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(report + "\n")
+    print(report)
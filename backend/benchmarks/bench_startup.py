@@ -0,0 +1,95 @@
+"""Measure what a fresh API worker pays before it can serve a request.
+
+Every sample is a new interpreter, so import caches never carry over:
+
+- ``lazy``: ``import backend.main`` as shipped; scrapers load on first use.
+- ``eager``: the same plus importing all four site modules and
+  selenium-wire, which is what every worker paid when ``backend.scrapers``
+  imported them up front.
+- ``preload_all``: ``SCRAPER_PRELOAD=all``, i.e. modules imported *and*
+  scrapers built at boot.
+
+For ``lazy`` it also times the deferred cost: the first ``get_scraper``.
+
+    python -m backend.benchmarks.bench_startup [--runs 5] [--out startup.json]
+"""
+from __future__ import annotations
+from typing import Any, Dict, List
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SITES = ("amazon", "flipkart", "jiomart", "croma")
+HEAVY = ("seleniumwire", "selenium", "mitmproxy", "dotenv", "httpx", "selectolax", "numpy")
+
+_PROBE = """
+import importlib, json, sys, time
+started = time.perf_counter()
+import backend.main
+from backend.scrapers import registry
+mode = sys.argv[1]
+if mode == "eager":
+    for site in {sites!r}:
+        importlib.import_module("backend.scrapers." + site)
+    importlib.import_module("seleniumwire.webdriver")  # driver_pool used to import it at module level
+elif mode == "preload_all":
+    registry.preload(registry.registered_sites())
+boot = time.perf_counter() - started
+rss = int(next(l for l in open("/proc/self/status") if l.startswith("VmRSS")).split()[1])
+out = {{"boot_ms": boot * 1000, "rss_kib": rss, "modules": len(sys.modules),
+        "loaded": [m for m in {heavy!r} if m in sys.modules]}}
+if mode == "lazy":
+    started = time.perf_counter()
+    registry.get_scraper("amazon")
+    out["first_scraper_ms"] = (time.perf_counter() - started) * 1000
+print(json.dumps(out))
+"""
+
+
+def _sample(mode: str, env: Dict[str, str]) -> Dict[str, Any]:
+    code = _PROBE.format(sites=SITES, heavy=HEAVY)
+    proc = subprocess.run(
+        [sys.executable, "-c", code, mode], env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run(runs: int) -> Dict[str, Any]:
+    scratch = tempfile.mkdtemp(prefix="bench-")
+    env = {
+        **os.environ,
+        "SCRAPERAPI_KEY": os.environ.get("SCRAPERAPI_KEY", "offline"),
+        "CACHE_PATH": os.path.join(scratch, "results.sqlite3"),
+        "HISTORY_PATH": os.path.join(scratch, "history.sqlite3"),
+        "JOBS_PATH": os.path.join(scratch, "jobs.sqlite3"),
+        "SCRAPER_PRELOAD": "",
+    }
+    results: Dict[str, Any] = {}
+    for mode in ("lazy", "eager", "preload_all"):
+        samples: List[Dict[str, Any]] = [_sample(mode, env) for _ in range(runs)]
+        summary = {
+            "boot_ms": round(statistics.median(s["boot_ms"] for s in samples), 1),
+            "rss_mib": round(statistics.median(s["rss_kib"] for s in samples) / 1024, 1),
+            "modules": samples[-1]["modules"],
+            "heavy_loaded": samples[-1]["loaded"],
+        }
+        if mode == "lazy":
+            summary["first_scraper_ms"] = round(statistics.median(s["first_scraper_ms"] for s in samples), 1)
+        results[mode] = summary
+    return {"benchmark": "startup", "runs": runs, "python": sys.version.split()[0], "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--out")
+    args = parser.parse_args()
+    report = json.dumps(run(args.runs), indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(report + "\n")
+    print(report)
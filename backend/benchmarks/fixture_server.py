@@ -0,0 +1,121 @@
+"""Serve saved result pages so scrapers can run without the network.
+
+Each site lives under its own prefix (``/amazon/...``, ``/flipkart/...``) and
+every path below it returns ``fixtures/<site>.html``. Point a scraper at it
+with ``SCRAPER_BASE_URL_<SITE>``; localhost is never sent through the proxy.
+
+    python -m backend.benchmarks.fixture_server            # serve on :8765
+    python -m backend.benchmarks.fixture_server --check    # smoke test: exits 1 on any failure
+
+``--check`` imports and builds every registered scraper, checks the
+capabilities each was registered with against its class, then runs the HTTP
+engine for pages 1 and 2 of each HTTP-capable site against the fixtures.
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+import argparse
+import os
+import threading
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _load() -> Dict[str, bytes]:
+    return {p.stem: p.read_bytes() for p in FIXTURES.glob("*.html")}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    pages: Dict[str, bytes] = {}
+
+    def do_GET(self) -> None:
+        site = self.path.lstrip("/").split("/", 1)[0].split("?", 1)[0]
+        body = self.pages.get(site)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def start(port: int = 0) -> ThreadingHTTPServer:
+    handler = type("FixtureHandler", (_Handler,), {"pages": _load()})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@contextmanager
+def serving(port: int = 0) -> Iterator[str]:
+    """Start the server and point every fixture site's base URL at it."""
+    server = start(port)
+    root = f"http://127.0.0.1:{server.server_address[1]}"
+    saved: Dict[str, Optional[str]] = {}
+    for site in server.RequestHandlerClass.pages:
+        key = f"SCRAPER_BASE_URL_{site.upper()}"
+        saved[key] = os.environ.get(key)
+        os.environ[key] = f"{root}/{site}"
+    try:
+        yield root
+    finally:
+        server.shutdown()
+        server.server_close()
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def _check() -> int:
+    os.environ.setdefault("SCRAPERAPI_KEY", "offline")
+    from backend.scrapers import registry
+
+    methods = ("search", "search_page", "search_image")
+    declared = {s: {m for m in methods if registry.supports(s, m)} for s in registry.registered_sites()}
+    failures = 0
+    for site, error in registry.preload(registry.registered_sites()).items():
+        print(f"{site}: {'FAILED to load: ' + error if error else 'loads'}")
+        failures += error is not None
+        actual = {m for m in methods if registry.supports(site, m)}
+        if error is None and actual != declared[site]:
+            print(f"{site}: FAILED registered with {sorted(declared[site])}, implements {sorted(actual)}")
+            failures += 1
+    with serving():
+        for site in ("amazon", "flipkart"):
+            os.environ[f"SCRAPER_ENGINE_{site.upper()}"] = "http"
+            registry.reset()
+            for page in (1, 2):
+                try:
+                    results = registry.get_scraper(site).search_page("phone", page)
+                except Exception as err:
+                    results, error = [], f"{type(err).__name__}: {err}"
+                else:
+                    error = None if results else "no products"
+                print(f"{site} page {page}: {len(results)} products" + (f" FAILED ({error})" if error else ""))
+                failures += error is not None
+                for product in results[:3]:
+                    print(f"  {product['name']} | {product['price']} | {product['url']}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args()
+    if args.check:
+        raise SystemExit(_check())
+    else:
+        server = start(args.port)
+        print(f"serving {', '.join(server.RequestHandlerClass.pages)} on http://127.0.0.1:{args.port}")
+        threading.Event().wait()
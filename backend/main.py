@@ -1,11 +1,83 @@
-from fastapi import FastAPI, Query, UploadFile, File
+from fastapi import FastAPI, Header, HTTPException, Query, Request, UploadFile, File, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
-from backend.scrapers import get_scraper
-from backend.models.product import Product
-import os
+from fastapi.middleware.gzip import GZipMiddleware
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+from backend.scrapers import config as scraper_config, get_scraper, preload, registered_sites, site_status, supports
+from backend.scrapers.driver_pool import close_pools, pool_stats, warm_pools
+from backend.models.batch import BatchRequest
+from backend.models.product import Product, ProductGroup
+from backend.services.batch import BatchScheduler
+from backend.services.breaker import breakers
+from backend.services.cache import result_cache
+from backend.services.deep import InvalidToken, Prefetcher, decode_token, encode_token, page_key
+from backend.services.encode import COMPRESS_LEVEL, COMPRESS_MIN_BYTES, FORMATS, ProductsResponse, dumps
+from backend.services.images import IMAGE_MAX_BYTES, IMAGE_MAX_REQUEST, Image, ImageTooLarge, read_upload
+from backend.services.jobs import SCRAPE_BACKEND, job_queue
+from backend.services.history import WatchScheduler, price_history, seed_watches
+from backend.services.matching import group_products
+from backend.services.metrics import configure_logging, http_requests, registry, request_id
+from backend.services.paging import SORTS, InvalidCursor, etag_matches, fingerprint, paginate
+from backend.services.ratelimit import rate_limits
+from backend.services.search import SiteResult, gather_sites, in_flight, iter_sites, merge_products, status_header
+import asyncio
+import json
+import logging
+import sys
+import time
+import uuid
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Start the background schedulers (defined below) and tear everything
+    down on shutdown."""
+    seed_watches(price_history)
+    watch_scheduler.start()
+    # Scraper modules load on first use; SCRAPER_PRELOAD pays that at boot instead.
+    sites = scraper_config.preload_sites(registered_sites())
+    if sites:
+        errors = await asyncio.get_running_loop().run_in_executor(None, preload, sites)
+        for site, error in errors.items():
+            if error:
+                logger.warning("[API] could not preload %s: %s", site, error)
+        logger.info("[API] preloaded %s", ", ".join(s for s in sites if not errors[s]) or "nothing")
+        warmed = await asyncio.get_running_loop().run_in_executor(None, warm_pools, sites)
+        for name, error in warmed.items():
+            if error:
+                logger.warning("[API] could not start drivers for %s: %s", name, error)
+    try:
+        yield
+    finally:
+        await watch_scheduler.stop()
+        await batch_scheduler.stop()
+        await prefetcher.stop()
+        price_history.close()
+        close_pools()
+        # Only loaded once a site has used its HTTP engine.
+        http_engine = sys.modules.get("backend.scrapers.http_engine")
+        if http_engine is not None:
+            http_engine.close_clients()
+
+
+app = FastAPI(lifespan=_lifespan)
+
+
+# Registered before CORS so the 413 still carries CORS headers and is logged.
+@app.middleware("http")
+async def _limit_image_uploads(request: Request, call_next):
+    # The multipart body is parsed before the route runs, so an oversized
+    # upload is refused here from its Content-Length instead.
+    if request.url.path == "/api/search/image":
+        size = request.headers.get("content-length", "")
+        if size.isdigit() and int(size) > IMAGE_MAX_REQUEST:
+            return JSONResponse({"detail": f"image larger than {IMAGE_MAX_BYTES} bytes"}, status_code=413)
+    return await call_next(request)
 
-app = FastAPI()
 
 app.add_middleware(
     CORSMiddleware,
@@ -13,31 +85,352 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Site-Status", "X-Site-Totals", "X-Total-Count", "X-Next-Cursor", "X-Request-ID", "ETag", "X-Continue"],
 )
+# Merged result lists run to hundreds of KB; small responses go out as-is.
+app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_BYTES, compresslevel=COMPRESS_LEVEL)
 
-@app.get("/api/search", response_model=List[Product])
-async def text_search(q: str = Query(...), sites: List[str] = Query(...)):
-    all_results = []
-    for site in sites:
+_FORMAT = Query("rows", pattern=f"^({'|'.join(FORMATS)})$", description="rows, or columns: one array per field")
+
+
+@app.middleware("http")
+async def _request_context(request: Request, call_next):
+    rid = request.headers.get("x-request-id") or uuid.uuid4().hex[:16]
+    token = request_id.set(rid)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        route = request.scope.get("route")
+        http_requests.observe(
+            time.perf_counter() - started,
+            request.method, getattr(route, "path", "unmatched"), str(status),
+        )
+        request_id.reset(token)
+    response.headers["X-Request-ID"] = rid
+    return response
+
+
+def _text_call(q: str):
+    if SCRAPE_BACKEND == "queue":
+        # Scraped, throttled and recorded by a worker process; the request
+        # only waits on the event loop.
+        async def queued(site: str):
+            if site not in registered_sites():
+                return None
+            return await job_queue().run_async(q, site)
+        return queued
+
+    def call(site: str):
+        scraper = get_scraper(site)
+        if not scraper:
+            return None
+        results = scraper.search(q)
+        price_history.record(results)
+        return results
+    return call
+
+
+def _page_call(q: str, page: int):
+    # Deeper pages always run in this process, also with SCRAPE_BACKEND=queue.
+    def call(site: str):
+        scraper = get_scraper(site)
+        if not scraper or not hasattr(scraper, "search_page"):
+            return None
+        results = scraper.search_page(q, page)
+        price_history.record(results)
+        return results
+    return call
+
+
+def _image_call(image: Image):
+    # The bytes live in the closure; each site gets its own temp file only for
+    # the duration of its browser upload, so background refreshes still work.
+    def call(site: str):
         scraper = get_scraper(site)
-        if scraper:
-            results = scraper.search(q)
-            print(f"[API] {site} returned {len(results)} results")
-            all_results.extend(results)
-    return all_results
+        if not scraper or not hasattr(scraper, "search_image"):
+            return None
+        with image.as_file() as path:
+            results = scraper.search_image(path)
+        price_history.record(results)
+        return results
+    return call
+
+
+watch_scheduler = WatchScheduler(price_history, _text_call, cache=result_cache)
+batch_scheduler = BatchScheduler(_text_call, cache=result_cache)
+prefetcher = Prefetcher(_page_call, cache=result_cache)
+
+
+@app.get("/api/search", response_model=List[Product])
+async def text_search(
+    q: str = Query(...),
+    sites: List[str] = Query(...),
+    fresh: bool = Query(False, description="Skip cached results and scrape again"),
+    sort: Optional[str] = Query(None, description=f"One of: {', '.join(SORTS)}"),
+    site: Optional[List[str]] = Query(None, description="Only return these of the searched sites"),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Page size; all results when omitted"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    format: str = _FORMAT,
+    if_none_match: Optional[str] = Header(None),
+):
+    if sort is not None and sort not in SORTS:
+        raise HTTPException(status_code=400, detail=f"unknown sort {sort!r}")
+    results = await gather_sites(sites, _text_call(q), cache=result_cache, query=q, use_cache=not fresh)
+    fp = fingerprint(q.lower().split(), sorted(sites), sort, sorted(site or []), min_price, max_price)
+    try:
+        page = paginate(results, sort, site, min_price, max_price, limit, cursor, fp)
+    except InvalidCursor as err:
+        raise HTTPException(status_code=400, detail=str(err))
+    deeper = _continue(q, results, 2, auto=True)
+    # Repeat polls of an unchanged page get a 304 without the body being
+    # serialized or sent.
+    etag = page.etag(format)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    # Per-site outcome (ok / timeout / error), counts and the next cursor
+    # travel in headers so the body stays a plain product list.
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "X-Site-Status": json.dumps(status_header(results)),
+        "X-Site-Totals": json.dumps(page.site_totals),
+        "X-Total-Count": str(page.total),
+    }
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+    if deeper:
+        headers["X-Continue"] = deeper
+    return ProductsResponse(page.items, format, headers)
+
+
+def _continue(q: str, results: List[SiteResult], page: int, auto: bool = False) -> Optional[str]:
+    """Start prefetching ``page`` and return the X-Continue token for it."""
+    if page > prefetcher.max_depth:
+        return None
+    sites = [r.site for r in results if r.status == "ok" and r.products and supports(r.site, "search_page")]
+    if not sites:
+        return None
+    prefetcher.schedule(q, sites, page, auto=auto)
+    return encode_token(q, sites, page)
+
+
+@app.get("/api/search/more", response_model=List[Product])
+async def more_results(token: str = Query(..., description="X-Continue from the previous page"), format: str = _FORMAT):
+    """The next result page of each site, usually already prefetched."""
+    try:
+        q, sites, page = decode_token(token)
+    except InvalidToken as err:
+        raise HTTPException(status_code=400, detail=str(err))
+    results = await gather_sites(sites, _page_call(q, page), cache=result_cache, query=page_key(q, page))
+    for r in results:
+        prefetcher.consumed(q, r.site, page)
+    headers = {"X-Site-Status": json.dumps(status_header(results))}
+    deeper = _continue(q, results, page + 1)
+    if deeper:
+        headers["X-Continue"] = deeper
+    return ProductsResponse(merge_products(results), format, headers)
+
+
+@app.get("/api/search/groups", response_model=List[ProductGroup])
+async def grouped_search(
+    response: Response,
+    q: str = Query(...),
+    sites: List[str] = Query(...),
+    fresh: bool = Query(False, description="Skip cached results and scrape again"),
+):
+    """Same search, with listings of the same product across sites grouped."""
+    results = await gather_sites(sites, _text_call(q), cache=result_cache, query=q, use_cache=not fresh)
+    response.headers["X-Site-Status"] = json.dumps(status_header(results))
+    return group_products(merge_products(results))
+
+
+def _site_chunk(result: SiteResult) -> Dict[str, Any]:
+    return {"site": result.site, **result.summary(), "products": result.products}
+
+
+@app.get("/api/search/stream")
+async def text_search_stream(
+    q: str = Query(...),
+    sites: List[str] = Query(...),
+    fresh: bool = Query(False, description="Skip cached results and scrape again"),
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+):
+    """One chunk per site, sent as soon as that site finishes.
+
+    Each chunk carries the site, its status, timing and products; the stream
+    ends with ``{"done": true}``. ``format=sse`` wraps the same chunks as
+    Server-Sent Events.
+    """
+    async def chunks():
+        async for result in iter_sites(sites, _text_call(q), cache=result_cache, query=q, use_cache=not fresh):
+            yield _site_chunk(result)
+        yield {"done": True}
+
+    if format == "sse":
+        async def body():
+            async for chunk in chunks():
+                event = "done" if chunk.get("done") else "site"
+                yield b"event: " + event.encode() + b"\ndata: " + dumps(chunk) + b"\n\n"
+        media_type = "text/event-stream"
+    else:
+        async def body():
+            async for chunk in chunks():
+                yield dumps(chunk) + b"\n"
+        media_type = "application/x-ndjson"
+
+    return StreamingResponse(body(), media_type=media_type, headers={"Cache-Control": "no-cache"})
 
 
 @app.post("/api/search/image", response_model=List[Product])
-async def image_search(file: UploadFile = File(...), sites: List[str] = Query(...)):
-    tmp_path = f"/tmp/{file.filename}"
-    with open(tmp_path, "wb") as f:
-        f.write(await file.read())
+async def image_search(file: UploadFile = File(...), sites: List[str] = Query(...), format: str = _FORMAT):
+    try:
+        image = await read_upload(file)
+    except ImageTooLarge as err:
+        raise HTTPException(status_code=413, detail=str(err))
+    if not image.data:
+        raise HTTPException(status_code=400, detail="empty upload")
+
+    # Sites without a real image search are reported, not run with a path as
+    # the query. Unknown sites still go through run_site and come back "unknown".
+    skipped = [
+        SiteResult(s, status="unsupported", error="no image search")
+        for s in dict.fromkeys(sites) if s in registered_sites() and not supports(s, "search_image")
+    ]
+    skip = {r.site for r in skipped}
+    results = await gather_sites(
+        [s for s in sites if s not in skip], _image_call(image), cache=result_cache, query=image.query,
+    )
+    headers = {"X-Site-Status": json.dumps(status_header(results + skipped))}
+    return ProductsResponse(merge_products(results), format, headers)
 
-    all_results = []
+
+@app.post("/api/search/batch", status_code=202)
+async def submit_batch(req: BatchRequest):
+    """Queue many queries at once; poll the returned id for progress and results."""
+    try:
+        batch = batch_scheduler.submit(req.queries, req.sites, req.fresh)
+    except ValueError as err:
+        raise HTTPException(status_code=400, detail=str(err))
+    return {"id": batch.id, "status": batch.status, "progress": batch.progress()}
+
+
+@app.get("/api/search/batch/{batch_id}")
+async def batch_status(batch_id: str, products: bool = Query(True, description="Include finished products")):
+    batch = batch_scheduler.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="unknown batch")
+    return batch.snapshot(products)
+
+
+@app.delete("/api/search/batch/{batch_id}")
+async def cancel_batch(batch_id: str):
+    batch = batch_scheduler.cancel(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="unknown batch")
+    return {"id": batch.id, "status": batch.status, "progress": batch.progress()}
+
+
+# The job routes are plain ``def`` so FastAPI runs them on its threadpool:
+# SQLite may wait up to 30s for a worker's write lock.
+@app.post("/api/jobs", status_code=202)
+def submit_jobs(q: str = Query(...), sites: List[str] = Query(...)):
+    """Queue scrapes without waiting; poll each id on /api/jobs/{id}."""
+    unknown = [s for s in sites if s not in registered_sites()]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"unknown sites: {', '.join(unknown)}")
+    return {s: job_queue().enqueue(q, s) for s in dict.fromkeys(sites)}
+
+
+@app.get("/api/jobs/{job_id}")
+def job_status(job_id: str):
+    job = job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown job")
+    return job.public()
+
+
+# The history routes are plain ``def`` so FastAPI runs them on its
+# threadpool: they share PriceHistory's lock with the batch writer.
+@app.get("/api/history")
+def product_history(
+    id: Optional[str] = Query(None, description="Product id"),
+    name: Optional[str] = Query(None, description="Product name, matched after normalization"),
+    site: Optional[str] = Query(None),
+    since: Optional[float] = Query(None, description="Unix timestamp"),
+    limit: int = Query(500, ge=1, le=5000),
+):
+    if not id and not name:
+        raise HTTPException(status_code=400, detail="id or name is required")
+    return price_history.series(product_id=id, name=name, site=site, since=since, limit=limit)
+
+
+@app.get("/api/history/watches")
+def list_watches():
+    return [{"query": q, "site": s} for q, s in price_history.watches()]
+
+
+@app.post("/api/history/watches", status_code=204)
+def add_watch(q: str = Query(...), sites: List[str] = Query(...)):
     for site in sites:
-        scraper = get_scraper(site)
-        if scraper and hasattr(scraper, "search_image"):
-            all_results.extend(scraper.search_image(tmp_path))
-    os.remove(tmp_path)
-    return all_results
+        price_history.watch(q, site)
+
+
+@app.delete("/api/history/watches", status_code=204)
+def remove_watch(q: str = Query(...), sites: List[str] = Query(...)):
+    for site in sites:
+        price_history.unwatch(q, site)
+
+
+@app.get("/api/stats/pools")
+async def driver_pool_stats():
+    return pool_stats()
+
+
+@app.get("/api/stats/cache")
+async def cache_stats():
+    return result_cache.stats()
+
+
+@app.get("/api/stats/singleflight")
+async def singleflight_stats():
+    return in_flight.stats()
+
+
+@app.get("/api/stats/ratelimits")
+async def rate_limit_stats():
+    return rate_limits.stats()
+
+
+@app.get("/api/stats/batches")
+async def batch_stats():
+    return batch_scheduler.stats()
+
+
+@app.get("/api/stats/jobs")
+def job_stats():
+    return job_queue().stats()
+
+
+@app.get("/api/stats/prefetch")
+async def prefetch_stats():
+    return prefetcher.stats()
+
+
+@app.get("/api/stats/health")
+async def site_health():
+    return breakers.stats(registered_sites())
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.expose(), media_type="text/plain; version=0.0.4")
+
 
+@app.get("/api/sites")
+async def sites_status():
+    return site_status()
@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+from typing import List
+
+class BatchRequest(BaseModel):
+    queries: List[str]
+    sites: List[str]
+    fresh: bool = False
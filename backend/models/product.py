@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from typing import Any, Dict, List, Optional, Tuple
+from typing_extensions import TypedDict
 
 class Product(BaseModel):
     id: str
@@ -10,3 +12,45 @@ class Product(BaseModel):
     url: str
     site: str
     availability: str
+
+class ProductRow(TypedDict):
+    """A validated :class:`Product` as a plain dict, which is what scrapers
+    return, the cache stores and the encoders write out."""
+    id: str
+    name: str
+    price: float
+    rating: float
+    reviews: int
+    imageUrl: str
+    url: str
+    site: str
+    availability: str
+
+class ProductGroup(BaseModel):
+    id: str
+    name: str
+    brand: Optional[str] = None
+    sites: List[str]
+    offers: List[Product]
+    cheapest: Optional[Product] = None
+    minPrice: Optional[float] = None
+    maxPrice: Optional[float] = None
+
+PRODUCT_FIELDS = tuple(Product.model_fields)
+
+_rows = TypeAdapter(List[ProductRow])
+_row = TypeAdapter(ProductRow)
+
+def validate_rows(rows: List[Dict[str, Any]]) -> Tuple[List[ProductRow], int]:
+    """Coerce rows to ``ProductRow`` and drop invalid ones; returns (rows, dropped)."""
+    try:
+        return _rows.validate_python(rows), 0
+    except ValidationError:
+        pass
+    out = []
+    for row in rows:
+        try:
+            out.append(_row.validate_python(row))
+        except ValidationError:
+            continue
+    return out, len(rows) - len(out)
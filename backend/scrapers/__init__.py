@@ -1,12 +1,15 @@
-from backend.scrapers.amazon import AmazonScraper
-from backend.scrapers.flipkart import FlipkartScraper
-from backend.scrapers.jiomart import JioMartScraper 
-from backend.scrapers.croma import CromaScraper 
+from backend.scrapers.registry import (
+    get_scraper, preload, register, register_lazy, registered_sites, site_status, supports,
+)
 
-def get_scraper(site_id: str):
-    return {
-        "amazon": AmazonScraper(),
-        "flipkart": FlipkartScraper(), 
-        "jiomart": JioMartScraper(),
-        "croma": CromaScraper(),
-    }.get(site_id)
+# Site modules pull in Selenium and selenium-wire, so they are only imported
+# when a site is first used (or preloaded at startup, see SCRAPER_PRELOAD).
+# Capabilities must match the methods each class defines.
+register_lazy("amazon", "backend.scrapers.amazon:AmazonScraper", ("search", "search_page", "search_image"))
+register_lazy("flipkart", "backend.scrapers.flipkart:FlipkartScraper", ("search", "search_page"))
+register_lazy("jiomart", "backend.scrapers.jiomart:JioMartScraper", ("search", "search_page"))
+register_lazy("croma", "backend.scrapers.croma:CromaScraper", ("search",))
+
+__all__ = [
+    "get_scraper", "preload", "register", "register_lazy", "registered_sites", "site_status", "supports",
+]
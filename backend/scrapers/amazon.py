@@ -1,14 +1,44 @@
 from __future__ import annotations
 from dotenv import load_dotenv
-from seleniumwire import webdriver  # seleniumwire is required
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from backend.scrapers.driver_pool import DriverProfile, get_pool
+from backend.scrapers.registry import register
+from backend.scrapers.lean import LeanProfile
+from backend.scrapers import config
+from backend.services.breaker import wait_budget
+from backend.services.metrics import phase
+from backend.scrapers.extract import CardSpec, extract, price_or_none, to_products
+from backend.scrapers.http_engine import HttpEngine, HttpSite, NeedsBrowser
 from typing import List, Dict, Any
 import os, time, logging
 
+SLOT = "div.s-main-slot"
 
+# Shared by the Selenium and HTTP engines.
+CARDS = CardSpec(
+    site="amazon",
+    steps=((SLOT, 0, 1), (".s-result-item.s-asin", 0, None)),
+    fields={
+        "title": ("a h2 span", "text"),
+        "link": ("a", "href"),
+        "image": ("img", "src"),
+        "price": (".a-price-whole", "text"),
+    },
+    parse_price=price_or_none,
+    key=r"/dp/([A-Z0-9]{10})",
+)
+
+# JavaScript is off, so only amazon's own hosts are ever needed.
+LEAN = LeanProfile(
+    "amazon",
+    allowed_hosts=("amazon.in", "media-amazon.com", "ssl-images-amazon.com", "images-amazon.com"),
+)
+
+
+@register("amazon")
 class AmazonScraper:
     def __init__(self) -> None:
         load_dotenv()
@@ -32,10 +62,11 @@ class AmazonScraper:
         self._opts.add_argument("--disable-gpu")
         self._opts.add_argument("--no-sandbox")
         self._opts.add_argument("--disable-dev-shm-usage")
-        self._opts.add_argument(
-            "--user-agent=Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) "
+        ua = (
+            "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) "
             "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Mobile Safari/537.36"
         )
+        self._opts.add_argument(f"--user-agent={ua}")
 
         self._opts.add_experimental_option(
             "prefs",
@@ -52,73 +83,78 @@ class AmazonScraper:
             },
         )
 
+        self._base_url = config.base_url("amazon", "https://www.amazon.in")
+        lean = LEAN.for_base_url(self._base_url)
+        lean.apply(self._opts, self._proxy)
+        self._pool = get_pool(DriverProfile(
+            "amazon", self._opts, self._proxy, setup=lean.install, on_release=lean.report,
+        ))
+
+        self._engine = config.engine("amazon", "auto")
+        self._http = HttpEngine(
+            HttpSite(
+                site="amazon",
+                base_url=self._base_url,
+                search_path="/s?k={query}",
+                page_param="&page={page}",
+                cards=CARDS,
+                block_markers=("/errors/validateCaptcha", "api-services-support@amazon.com"),
+                headers={"User-Agent": ua, "Accept-Language": "en-IN,en;q=0.9"},
+            ),
+            proxy=self._proxy["proxy"]["https"],
+        )
+
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
 
     # ------------------------------------- #
     def search(self, query: str) -> List[Dict[str, Any]]:
-        drv = webdriver.Chrome(seleniumwire_options=self._proxy, options=self._opts)
-        try:
-            drv.get(f"https://www.amazon.in/s?k={query}")
-            slot = WebDriverWait(drv, 15).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div.s-main-slot"))
-            )
+        return self.search_page(query, 1)
 
-            cards = slot.find_elements(By.CSS_SELECTOR, ".s-result-item.s-asin")
-            results = self._parse(cards[:10])
+    def search_page(self, query: str, page: int) -> List[Dict[str, Any]]:
+        if self._engine != "selenium":
+            try:
+                return self._http.search(query, page)
+            except NeedsBrowser as err:
+                if self._engine == "http":
+                    raise
+                self.logger.info(f"[AmazonScraper] falling back to browser: {err}")
+        return self._search_browser(query, page)
+
+    def _search_browser(self, query: str, page: int = 1) -> List[Dict[str, Any]]:
+        with self._pool.lease() as drv:
+            with phase("amazon", "navigate"):
+                drv.get(f"{self._base_url}/s?k={query}" + (f"&page={page}" if page > 1 else ""))
+            with phase("amazon", "wait"), wait_budget("amazon", 15) as timeout:
+                WebDriverWait(drv, timeout).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, SLOT))
+                )
+
+            results = self._parse(drv)
 
             self.logger.info(f"[AmazonScraper] Found {len(results)} products for query '{query}'")
             return results
-        finally:
-            drv.quit()
 
     # ------------------------------------- #
     def search_image(self, path: str) -> List[Dict[str, Any]]:
-        drv = webdriver.Chrome(seleniumwire_options=self._proxy, options=self._opts)
-        try:
-            drv.get("https://www.amazon.in")
-            wait = WebDriverWait(drv, 15)
-            btn = self._find_cam(wait)
-            btn.click()
-            time.sleep(2)
-            drv.find_element(By.CSS_SELECTOR, "input[type='file']").send_keys(path)
-            slot = WebDriverWait(drv, 20).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div.s-main-slot"))
-            )
-            cards = slot.find_elements(By.CSS_SELECTOR, ".s-result-item.s-asin")
-            return self._parse(cards[:10])
-        finally:
-            drv.quit()
+        with self._pool.lease() as drv:
+            with phase("amazon", "navigate"):
+                drv.get(self._base_url)
+            with phase("amazon", "upload"):
+                wait = WebDriverWait(drv, 15)
+                btn = self._find_cam(wait)
+                btn.click()
+                time.sleep(2)
+                drv.find_element(By.CSS_SELECTOR, "input[type='file']").send_keys(path)
+            with phase("amazon", "wait"):
+                WebDriverWait(drv, 20).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, SLOT))
+                )
+            return self._parse(drv)
 
     # ------------------------------------- #
-    def _parse(self, elems) -> List[Dict[str, Any]]:
-        out = []
-        for el in elems:
-            try:
-                title = el.find_element(By.CSS_SELECTOR, "a h2 span").text
-                link = el.find_element(By.CSS_SELECTOR, "a").get_attribute("href")
-                img = el.find_element(By.CSS_SELECTOR, "img").get_attribute("src")
-
-                try:
-                    price_text = el.find_element(By.CSS_SELECTOR, ".a-price-whole").text
-                    price = float(price_text.replace(",", ""))
-                except Exception:
-                    price = None
-
-                out.append({
-                    "id": f"amazon-{hash(title)}",
-                    "name": title,
-                    "price": price,
-                    "rating": 0.0,
-                    "reviews": 0,
-                    "imageUrl": img,
-                    "url": link,
-                    "site": "amazon",
-                    "availability": "in-stock",
-                })
-            except Exception:
-                continue
-        return out
+    def _parse(self, drv) -> List[Dict[str, Any]]:
+        return to_products(extract(drv, CARDS), CARDS)
 
     # ------------------------------------- #
     @staticmethod
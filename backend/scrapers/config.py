@@ -0,0 +1,31 @@
+from __future__ import annotations
+from typing import List, Optional
+import os
+
+# Per-site settings come from the environment as <NAME>_<SITE>, e.g.
+# SCRAPER_ENGINE_AMAZON=http or SCRAPER_BASE_URL_FLIPKART=http://127.0.0.1:8765/flipkart
+
+
+def site_env(name: str, site: str, default: Optional[str] = None) -> Optional[str]:
+    return os.getenv(f"{name}_{site.upper()}", os.getenv(name, default))
+
+
+def base_url(site: str, default: str) -> str:
+    """Site origin, overridable so scrapers can be pointed at saved pages."""
+    return (os.getenv(f"SCRAPER_BASE_URL_{site.upper()}") or default).rstrip("/")
+
+
+def engine(site: str, default: str = "selenium") -> str:
+    """``http``, ``selenium`` or ``auto`` (HTTP first, browser on failure)."""
+    value = (site_env("SCRAPER_ENGINE", site, default) or default).lower()
+    if value not in ("http", "selenium", "auto"):
+        raise EnvironmentError(f"unknown scraper engine {value!r} for {site}")
+    return value
+
+
+def preload_sites(registered: List[str]) -> List[str]:
+    """Sites to import and build at startup: SCRAPER_PRELOAD=all or a comma list."""
+    value = os.getenv("SCRAPER_PRELOAD", "").strip().lower()
+    if value == "all":
+        return list(registered)
+    return [s for s in (p.strip() for p in value.split(",")) if s in registered]
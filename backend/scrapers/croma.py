@@ -1,15 +1,40 @@
 from __future__ import annotations
-from seleniumwire import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
 from dotenv import load_dotenv
+from backend.scrapers.driver_pool import DriverProfile, get_pool
+from backend.scrapers.registry import register
+from backend.scrapers.lean import LeanProfile
+from backend.scrapers import config
+from backend.scrapers.extract import CardSpec, extract, price_digits, to_products
+from backend.services.breaker import wait_budget
+from backend.services.metrics import phase
 from typing import List, Dict, Any
+import logging
 import os
-import re
-import time
+
+logger = logging.getLogger(__name__)
+
+CARD = "li.product-item"
+
+CARDS = CardSpec(
+    site="croma",
+    steps=((CARD, 0, None),),
+    fields={
+        "title": ("h3.product-title", "text"),
+        "link": ("a.product-title", "href"),
+        "image": ("img", "src"),
+        "price": ("span.new-price", "text"),
+    },
+    parse_price=price_digits,
+    key=r"/p/(\d+)",
+)
+
+# Results are rendered by JavaScript, so scripts, XHR and CSS stay allowed;
+# only media, fonts and trackers are dropped.
+LEAN = LeanProfile("croma")
 
 
 class BaseScraper:
@@ -67,12 +92,21 @@ class BaseScraper:
             },
         )
 
-    def _start_driver(self) -> webdriver.Chrome:
-        # Start Selenium Wire Chrome driver with proxy and options
-        driver = webdriver.Chrome(
-            seleniumwire_options=self._seleniumwire_options,
-            options=self._opts
-        )
+        self._base_url = config.base_url("croma", "https://www.croma.com")
+
+        # Drivers come from the shared pool and are reused across searches
+        LEAN.apply(self._opts, self._seleniumwire_options)
+        self._pool = get_pool(DriverProfile(
+            "croma",
+            self._opts,
+            self._seleniumwire_options,
+            setup=self._configure_driver,
+            on_release=LEAN.report,
+        ))
+
+    @staticmethod
+    def _configure_driver(driver) -> None:
+        LEAN.install(driver)
 
         # Override headers to mimic a real browser more closely
         driver.header_overrides = {
@@ -85,66 +119,23 @@ class BaseScraper:
             # You can add more headers here if needed
         }
 
-        return driver
-
 
+@register("croma")
 class CromaScraper(BaseScraper):
     def search(self, query: str) -> List[Dict[str, Any]]:
-        driver = self._start_driver()
-        try:
-            driver.get(f"https://www.croma.com/searchB?q={query}")
-
-            try:
-                WebDriverWait(driver, 20).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "li.product-item"))
+        with self._pool.lease() as driver:
+            with phase("croma", "navigate"):
+                driver.get(f"{self._base_url}/searchB?q={query}")
+
+            # A timeout propagates: it counts against the breaker and is not
+            # cached as an empty result.
+            with phase("croma", "wait"), wait_budget("croma", 20) as timeout:
+                WebDriverWait(driver, timeout).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, CARD))
                 )
-            except TimeoutException:
-                print(f"[Croma] No results found for query: {query}")
-                return []
-
-            products = driver.find_elements(By.CSS_SELECTOR, "li.product-item")
-            results = self._parse(products[:10])  # Limit to first 10 results
-
-            # Add delay to throttle requests
-            time.sleep(10)
-
-            return results
-
-        finally:
-            driver.quit()
-
-    def search_image(self, image_keywords: str) -> List[Dict[str, Any]]:
-        # Image search simply delegates to text search
-        return self.search(image_keywords)
-
-    def _parse(self, product_cards) -> List[Dict[str, Any]]:
-        results = []
-        for item in product_cards:
-            try:
-                title = item.find_element(By.CSS_SELECTOR, "h3.product-title").text
-                link = item.find_element(By.CSS_SELECTOR, "a.product-title").get_attribute("href")
-                img = item.find_element(By.CSS_SELECTOR, "img").get_attribute("src")
-
-                try:
-                    price_text = item.find_element(By.CSS_SELECTOR, "span.new-price").text
-                    # Remove commas and non-digit characters except dot for float conversion
-                    price = float(re.sub(r"[^\d.]", "", price_text.replace(",", "")))
-                except Exception:
-                    price = 0.0
-
-                results.append({
-                    "id": f"croma-{hash(title)}",
-                    "name": title,
-                    "price": price,
-                    "rating": 0.0,  # No rating data available
-                    "reviews": 0,   # No reviews data available
-                    "imageUrl": img,
-                    "url": link,
-                    "site": "croma",
-                    "availability": "in-stock",  # Assumed in stock
-                })
-
-            except Exception as e:
-                print(f"[Croma Parse Error] {e}")
-                continue
-        return results
+
+            # Throttling happens before the fetch (services.ratelimit), not here
+            return self._parse(driver)
+
+    def _parse(self, driver) -> List[Dict[str, Any]]:
+        return to_products(extract(driver, CARDS), CARDS)
@@ -0,0 +1,285 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from backend.services.metrics import phase
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+import logging
+import os
+import threading
+import time
+
+if TYPE_CHECKING:
+    from selenium.webdriver.chrome.options import Options
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "2"))
+POOL_MAX_USES = int(os.getenv("DRIVER_POOL_MAX_USES", "50"))
+POOL_TIMEOUT = float(os.getenv("DRIVER_POOL_TIMEOUT", "30"))
+# Drivers started per pool for sites preloaded at startup (SCRAPER_PRELOAD),
+# so the first searches skip Chrome's launch. 0 leaves pools to fill on demand.
+POOL_WARM = int(os.getenv("DRIVER_POOL_WARM", "0"))
+
+
+class PoolTimeout(TimeoutError):
+    pass
+
+
+@dataclass
+class DriverProfile:
+    """Everything needed to launch a Chrome for one site.
+
+    Drivers are only shared between callers using the same profile name, so
+    proxy, user-agent and prefs never leak from one site to another.
+    """
+    name: str
+    options: Options
+    seleniumwire_options: Optional[Dict[str, Any]] = None
+    setup: Optional[Callable[[Any], None]] = None
+    # Called with the driver at the end of every lease, before it is reset.
+    on_release: Optional[Callable[[Any], None]] = None
+    size: int = 0
+    max_uses: int = POOL_MAX_USES
+
+    def __post_init__(self) -> None:
+        if not self.size:
+            self.size = int(os.getenv(f"DRIVER_POOL_SIZE_{self.name.upper()}", POOL_SIZE))
+
+
+@dataclass
+class _Slot:
+    driver: Any
+    uses: int = 0
+    created: float = field(default_factory=time.monotonic)
+
+
+class DriverPool:
+    def __init__(self, profile: DriverProfile) -> None:
+        self.profile = profile
+        self._idle: List[_Slot] = []
+        self._in_use = 0
+        self._starting = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "leases": 0,
+            "created": 0,
+            "recycled": 0,
+            "crashed": 0,
+            "timeouts": 0,
+            "wait_total": 0.0,
+            "wait_max": 0.0,
+        }
+
+    # ------------------------------------- #
+    @contextmanager
+    def lease(self, timeout: float = POOL_TIMEOUT) -> Iterator[Any]:
+        with phase(self.profile.name, "lease"):
+            slot = self._acquire(timeout)
+        failed = False
+        try:
+            yield slot.driver
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self._release(slot, failed)
+
+    def warm(self, count: Optional[int] = None) -> None:
+        count = min(count or self.profile.size, self.profile.size)
+        while True:
+            with self._cond:
+                if len(self._idle) + self._in_use + self._starting >= count:
+                    return
+                self._starting += 1
+            try:
+                slot = self._new_slot()
+            finally:
+                with self._cond:
+                    self._starting -= 1
+            with self._cond:
+                self._idle.append(slot)
+                self._cond.notify()
+
+    def close(self) -> None:
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for slot in idle:
+            self._quit(slot)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            leases = self._stats["leases"]
+            return {
+                "size": self.profile.size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "starting": self._starting,
+                "occupancy": self._in_use / self.profile.size,
+                "wait_avg_ms": round(self._stats["wait_total"] / leases * 1000, 1) if leases else 0.0,
+                "wait_max_ms": round(self._stats["wait_max"] * 1000, 1),
+                **{k: v for k, v in self._stats.items() if k not in ("wait_total", "wait_max")},
+            }
+
+    # ------------------------------------- #
+    def _acquire(self, timeout: float) -> _Slot:
+        started = time.monotonic()
+        deadline = started + timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    slot = self._idle.pop()
+                    break
+                if self._in_use + self._starting < self.profile.size:
+                    slot = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"no {self.profile.name} driver free after {timeout:g}s"
+                    )
+                self._cond.wait(remaining)
+            self._in_use += 1
+
+        if slot is not None and not self._healthy(slot):
+            self._stats_add("crashed")
+            self._quit(slot)
+            slot = None
+        if slot is None:
+            try:
+                slot = self._new_slot()
+            except BaseException:
+                with self._cond:
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+
+        waited = time.monotonic() - started
+        with self._cond:
+            self._stats["leases"] += 1
+            self._stats["wait_total"] += waited
+            self._stats["wait_max"] = max(self._stats["wait_max"], waited)
+        slot.uses += 1
+        return slot
+
+    def _release(self, slot: _Slot, failed: bool) -> None:
+        if self.profile.on_release:
+            try:
+                self.profile.on_release(slot.driver)
+            except Exception as err:
+                logger.warning("[DriverPool] release hook failed: %s", err)
+        keep = True
+        if failed and not self._healthy(slot):
+            self._stats_add("crashed")
+            keep = False
+        elif slot.uses >= self.profile.max_uses:
+            self._stats_add("recycled")
+            keep = False
+        elif not self._reset(slot):
+            keep = False
+
+        if not keep:
+            self._quit(slot)
+        with self._cond:
+            self._in_use -= 1
+            if keep:
+                self._idle.append(slot)
+            self._cond.notify()
+
+    def _new_slot(self) -> _Slot:
+        kwargs: Dict[str, Any] = {"options": self.profile.options}
+        if self.profile.seleniumwire_options is not None:
+            kwargs["seleniumwire_options"] = self.profile.seleniumwire_options
+        with phase(self.profile.name, "driver_start"):
+            from seleniumwire import webdriver  # heavy; only needed once a browser starts
+
+            driver = webdriver.Chrome(**kwargs)
+            if self.profile.setup:
+                self.profile.setup(driver)
+        self._stats_add("created")
+        logger.info("[DriverPool] started %s driver", self.profile.name)
+        return _Slot(driver)
+
+    @staticmethod
+    def _healthy(slot: _Slot) -> bool:
+        try:
+            slot.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(slot: _Slot) -> bool:
+        drv = slot.driver
+        try:
+            parts = urlsplit(drv.current_url)
+            if parts.scheme in ("http", "https"):
+                drv.execute_cdp_cmd(
+                    "Storage.clearDataForOrigin",
+                    {"origin": f"{parts.scheme}://{parts.netloc}", "storageTypes": "all"},
+                )
+            drv.delete_all_cookies()
+            drv.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            drv.get("about:blank")
+            # seleniumwire keeps every captured request in memory
+            del drv.requests
+            return True
+        except Exception as err:
+            logger.warning("[DriverPool] reset failed, discarding driver: %s", err)
+            return False
+
+    @staticmethod
+    def _quit(slot: _Slot) -> None:
+        try:
+            slot.driver.quit()
+        except Exception:
+            pass
+
+    def _stats_add(self, key: str) -> None:
+        with self._cond:
+            self._stats[key] += 1
+
+
+# ------------------------------------- #
+_pools: Dict[str, DriverPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(profile: DriverProfile) -> DriverPool:
+    """Return the pool for ``profile.name``, creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get(profile.name)
+        if pool is None:
+            pool = _pools[profile.name] = DriverPool(profile)
+        return pool
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    with _pools_lock:
+        pools = dict(_pools)
+    return {name: pool.stats() for name, pool in pools.items()}
+
+
+def warm_pools(names: List[str], count: int = POOL_WARM) -> Dict[str, Optional[str]]:
+    """Start up to ``count`` drivers in each existing pool among ``names``;
+    returns any error per pool. Pools are created by building the scrapers."""
+    with _pools_lock:
+        pools = {name: _pools[name] for name in names if name in _pools}
+    out: Dict[str, Optional[str]] = {}
+    if count <= 0:
+        return out
+    for name, pool in pools.items():
+        try:
+            pool.warm(count)
+            out[name] = None
+        except Exception as err:
+            out[name] = f"{type(err).__name__}: {err}"
+    return out
+
+
+def close_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,179 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from selectolax.lexbor import LexborHTMLParser
+from backend.models.product import validate_rows
+from backend.services.metrics import phase, scrape_cards
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+import hashlib
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# A step is (css selector, start, stop): select under every current node, then
+# slice the combined matches like ``found[start:stop]``.
+Step = Tuple[str, int, Optional[int]]
+# A field is (css selector inside the card, what to read). ``text`` is the
+# rendered text, ``textContent`` the raw text, anything else a DOM property or
+# attribute such as ``href`` / ``src`` (properties come back as absolute URLs).
+Field = Tuple[str, str]
+
+
+def price_or_none(text: str) -> Optional[float]:
+    try:
+        return float(text.replace(",", ""))
+    except ValueError:
+        return None
+
+
+def price_digits(text: str) -> float:
+    # Remove commas and non-digit characters except dot for float conversion
+    try:
+        return float(re.sub(r"[^\d.]", "", text.replace(",", "")))
+    except ValueError:
+        return 0.0
+
+
+def price_rupees(text: str) -> Optional[float]:
+    try:
+        return float(text.replace("₹", "").replace(",", "").strip())
+    except ValueError:
+        return None
+
+
+@dataclass(frozen=True)
+class CardSpec:
+    site: str
+    steps: Tuple[Step, ...]
+    fields: Dict[str, Field]  # title, link, image, price
+    parse_price: Callable[[str], Optional[float]]
+    limit: int = 10
+    # Cards missing any of these are dropped.
+    required: Tuple[str, ...] = ("title", "link", "image")
+    # Regex over the product URL whose first group is the site's own product
+    # key (ASIN, pid ...); the canonical URL is used when it does not match.
+    key: Optional[str] = None
+
+    def script_args(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        return {
+            "steps": [list(s) for s in self.steps],
+            "fields": {name: list(f) for name, f in self.fields.items()},
+            "limit": limit or self.limit,
+        }
+
+
+# Runs in the page: walks the steps and reads every field of every card, so a
+# whole result page costs one WebDriver round-trip.
+EXTRACT_JS = """
+const spec = arguments[0];
+let nodes = [document];
+for (const [sel, start, stop] of spec.steps) {
+  const found = [];
+  for (const n of nodes) found.push(...n.querySelectorAll(sel));
+  nodes = found.slice(start, stop === null ? undefined : stop);
+}
+return nodes.slice(0, spec.limit).map((card) => {
+  const out = {};
+  for (const [name, [sel, what]] of Object.entries(spec.fields)) {
+    const el = card.querySelector(sel);
+    if (!el) { out[name] = null; continue; }
+    if (what === "text") out[name] = el.innerText;
+    else if (what === "textContent") out[name] = el.textContent;
+    else out[name] = typeof el[what] === "string" ? el[what] : el.getAttribute(what);
+  }
+  return out;
+});
+"""
+
+
+def extract(driver, spec: CardSpec, limit: Optional[int] = None) -> List[Dict[str, Optional[str]]]:
+    """Raw card fields from the page currently loaded in ``driver``."""
+    with phase(spec.site, "parse"):
+        return driver.execute_script(EXTRACT_JS, spec.script_args(limit)) or []
+
+
+def extract_html(html: str, spec: CardSpec, limit: Optional[int] = None) -> List[Dict[str, Optional[str]]]:
+    """Same as :func:`extract`, over a fetched HTML document.
+
+    Raises ``LookupError`` when a container step matches nothing.
+    """
+    with phase(spec.site, "parse"):
+        return _extract_html(html, spec, limit)
+
+
+def _extract_html(html: str, spec: CardSpec, limit: Optional[int]) -> List[Dict[str, Optional[str]]]:
+    nodes = [LexborHTMLParser(html).root]
+    last = len(spec.steps) - 1
+    for i, (selector, start, stop) in enumerate(spec.steps):
+        found = []
+        for node in nodes:
+            found.extend(node.css(selector))
+        if not found and i < last:
+            raise LookupError(selector)
+        nodes = found[start:stop]
+
+    out = []
+    for card in nodes[:limit or spec.limit]:
+        raw: Dict[str, Optional[str]] = {}
+        for name, (selector, what) in spec.fields.items():
+            el = card.css_first(selector)
+            if el is None:
+                raw[name] = None
+            elif what in ("text", "textContent"):
+                raw[name] = el.text(deep=True)
+            else:
+                raw[name] = el.attributes.get(what)
+        out.append(raw)
+    return out
+
+
+def canonical_url(url: str) -> str:
+    """``url`` without query, fragment or trailing slash; host lowercased."""
+    parts = urlsplit(url)
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}{parts.path.rstrip('/')}"
+
+
+def product_id(spec: CardSpec, url: Optional[str], title: str) -> str:
+    """Stable id from the site and its product key, the same in every process."""
+    key = None
+    if url and spec.key:
+        match = re.search(spec.key, url)
+        key = match.group(1) if match else None
+    if key is None:
+        key = canonical_url(url) if url else title
+    digest = hashlib.blake2b(f"{spec.site}\x1f{key}".encode(), digest_size=8).hexdigest()
+    return f"{spec.site}-{digest}"
+
+
+def to_products(raw: List[Dict[str, Optional[str]]], spec: CardSpec, base_url: str = "") -> List[Dict[str, Any]]:
+    """Normalize raw card fields into validated product rows, dropping
+    incomplete cards. Nothing downstream validates them again."""
+    out = []
+    dropped = 0
+    for card in raw:
+        title = " ".join((card.get("title") or "").split())
+        price = spec.parse_price(" ".join((card.get("price") or "").split()))
+        values = {"title": title, "link": card.get("link"), "image": card.get("image"), "price": price}
+        if any(values[name] in (None, "") for name in spec.required):
+            dropped += 1
+            continue
+        url = urljoin(base_url + "/", values["link"]) if base_url else values["link"]
+        out.append({
+            "id": product_id(spec, url, title),
+            "name": title,
+            "price": price,
+            "rating": 0.0,
+            "reviews": 0,
+            "imageUrl": urljoin(base_url + "/", values["image"]) if base_url else values["image"],
+            "url": url,
+            "site": spec.site,
+            "availability": "in-stock",
+        })
+    out, invalid = validate_rows(out)
+    dropped += invalid
+    scrape_cards.inc(spec.site, "ok", amount=len(out))
+    if dropped:
+        scrape_cards.inc(spec.site, "dropped", amount=dropped)
+        logger.debug("[extract] %s: dropped %d incomplete cards", spec.site, dropped)
+    return out
@@ -1,14 +1,45 @@
 from __future__ import annotations
-from seleniumwire import webdriver  # must be seleniumwire, not selenium
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from dotenv import load_dotenv
+from backend.scrapers.driver_pool import DriverProfile, get_pool
+from backend.scrapers.registry import register
+from backend.scrapers.lean import LeanProfile
+from backend.scrapers import config
+from backend.services.breaker import wait_budget
+from backend.services.metrics import phase
+from backend.scrapers.extract import CardSpec, extract, price_digits, to_products
+from backend.scrapers.http_engine import HttpEngine, HttpSite, NeedsBrowser
 from typing import List, Dict, Any
+import logging
 import os
-import re
 
+logger = logging.getLogger(__name__)
+
+CONTAINER = "div.DOjaWF.gdgoEp"
+
+# Shared by the Selenium and HTTP engines. The last container holds the result
+# rows; the first row is a header and the last two are pagination/feedback.
+CARDS = CardSpec(
+    site="flipkart",
+    steps=((CONTAINER, -1, None), ("div.cPHDOP", 1, -2), ("div._75nlfW > div", 0, None)),
+    fields={
+        "title": ("div.KzDlHZ", "text"),
+        "link": ("a.CGtC98", "href"),
+        "image": ("img", "src"),
+        "price": ("div.Nx9bqj", "text"),
+    },
+    parse_price=price_digits,
+    key=r"[?&]pid=([A-Z0-9]+)",
+)
+
+# JavaScript is off, so only flipkart's own hosts are ever needed.
+LEAN = LeanProfile("flipkart", allowed_hosts=("flipkart.com", "flixcart.com"))
+
+
+@register("flipkart")
 class FlipkartScraper:
     def __init__(self) -> None:
         load_dotenv()
@@ -33,10 +64,11 @@ class FlipkartScraper:
         self._opts.add_argument("--disable-gpu")
         self._opts.add_argument("--no-sandbox")
         self._opts.add_argument("--disable-dev-shm-usage")
-        self._opts.add_argument(
-            "--user-agent=Mozilla/5.0 (Linux; Android 6.0; Nexus 5) "
+        ua = (
+            "Mozilla/5.0 (Linux; Android 6.0; Nexus 5) "
             "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Mobile Safari/537.36"
         )
+        self._opts.add_argument(f"--user-agent={ua}")
         self._opts.add_experimental_option(
             "prefs",
             {
@@ -51,63 +83,52 @@ class FlipkartScraper:
                 }
             },
         )
+        self._base_url = config.base_url("flipkart", "https://www.flipkart.com")
+        lean = LEAN.for_base_url(self._base_url)
+        lean.apply(self._opts, self._proxy)
+        self._pool = get_pool(DriverProfile(
+            "flipkart", self._opts, self._proxy, setup=lean.install, on_release=lean.report,
+        ))
+
+        self._engine = config.engine("flipkart", "auto")
+        self._http = HttpEngine(
+            HttpSite(
+                site="flipkart",
+                base_url=self._base_url,
+                search_path="/search?q={query}",
+                page_param="&page={page}",
+                cards=CARDS,
+                block_markers=("Are you a human?", "g-recaptcha"),
+                headers={"User-Agent": ua, "Accept-Language": "en-IN,en;q=0.9"},
+            ),
+            proxy=self._proxy["proxy"]["https"],
+        )
 
     def search(self, query: str) -> List[Dict[str, Any]]:
-        drv = webdriver.Chrome(seleniumwire_options=self._proxy, options=self._opts)
-        try:
-            drv.get(f"https://www.flipkart.com/search?q={query}")
-
-            # Wait for main container
-            container = WebDriverWait(drv, 15).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.DOjaWF.gdgoEp"))
-            )[-1]
-
-            product_containers = container.find_elements(By.CSS_SELECTOR, "div.cPHDOP")[1:-2]
+        return self.search_page(query, 1)
 
-            products = []
-            for product_container in product_containers:
-                products.extend(product_container.find_elements(By.CSS_SELECTOR, "div._75nlfW > div"))
-
-            return self._parse(products[:10])
-
-        finally:
-            drv.quit()
-
-    def search_image(self, image_keywords: str) -> List[Dict[str, Any]]:
-        # Simulated image-based search using keywords
-        return self.search(image_keywords)
-
-
-
-    def _parse(self, product_cards) -> List[Dict[str, Any]]:
-        results = []
-        for item in product_cards:
+    def search_page(self, query: str, page: int) -> List[Dict[str, Any]]:
+        if self._engine != "selenium":
             try:
-                title = item.find_element(By.CSS_SELECTOR, "div.KzDlHZ").text
-                link = item.find_element(By.CSS_SELECTOR, "a.CGtC98").get_attribute("href")
-                img = item.find_element(By.CSS_SELECTOR, "img").get_attribute("src")
+                return self._http.search(query, page)
+            except NeedsBrowser as err:
+                if self._engine == "http":
+                    raise
+                logger.info(f"[FlipkartScraper] falling back to browser: {err}")
+        return self._search_browser(query, page)
+
+    def _search_browser(self, query: str, page: int = 1) -> List[Dict[str, Any]]:
+        with self._pool.lease() as drv:
+            with phase("flipkart", "navigate"):
+                drv.get(f"{self._base_url}/search?q={query}" + (f"&page={page}" if page > 1 else ""))
 
-                try:
-                    price_text = item.find_element(By.CSS_SELECTOR, "div.Nx9bqj").text
-                    # Clean the price string and convert to float
-                    price = float(re.sub(r"[^\d.]", "", price_text.replace(",", "")))
-                except Exception:
-                    price = 0.0  # Or use `None` if you prefer
-
-                results.append({
-                    "id": f"flipkart-{hash(title)}",
-                    "name": title,
-                    "price": price,
-                    "rating": 0.0,
-                    "reviews": 0,
-                    "imageUrl": img,
-                    "url": link,
-                    "site": "flipkart",
-                    "availability": "in-stock",
-                })
+            # Wait for main container
+            with phase("flipkart", "wait"), wait_budget("flipkart", 15) as timeout:
+                WebDriverWait(drv, timeout).until(
+                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, CONTAINER))
+                )
 
-            except Exception as e:
-                print(f"[Parse Error] {e}")
-                continue
-        return results
+            return self._parse(drv)
 
+    def _parse(self, drv) -> List[Dict[str, Any]]:
+        return to_products(extract(drv, CARDS), CARDS)
@@ -0,0 +1,99 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from backend.scrapers.extract import CardSpec, extract_html, to_products
+from backend.services.metrics import phase
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote_plus, urlsplit
+import httpx
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Hosts that never go through the scraping proxy (mirrors seleniumwire's no_proxy).
+NO_PROXY_HOSTS = ("localhost", "127.0.0.1")
+BLOCK_STATUS = (403, 429, 503)
+
+
+class NeedsBrowser(RuntimeError):
+    """The page could not be scraped over plain HTTP (blocked, captcha, JS-only)."""
+
+
+@dataclass(frozen=True)
+class HttpSite:
+    site: str
+    base_url: str
+    search_path: str  # formatted with the url-encoded ``query``
+    cards: CardSpec
+    page_param: str = ""  # appended for pages after the first, formatted with ``page``
+    block_markers: Tuple[str, ...] = ()
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+_clients: Dict[Optional[str], httpx.Client] = {}
+_clients_lock = threading.Lock()
+
+
+def _client(proxy: Optional[str]) -> httpx.Client:
+    # One keep-alive client per proxy, shared by every site and thread.
+    with _clients_lock:
+        client = _clients.get(proxy)
+        if client is None:
+            client = _clients[proxy] = httpx.Client(
+                proxy=proxy,
+                verify=proxy is None,
+                timeout=httpx.Timeout(20.0, connect=10.0),
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+                follow_redirects=True,
+            )
+        return client
+
+
+def close_clients() -> None:
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+class HttpEngine:
+    def __init__(self, spec: HttpSite, proxy: Optional[str] = None) -> None:
+        self.spec = spec
+        self._proxy = proxy
+
+    # ------------------------------------- #
+    def search(self, query: str, page: int = 1) -> List[Dict[str, Any]]:
+        url = self.spec.base_url + self.spec.search_path.format(query=quote_plus(query))
+        if page > 1:
+            url += self.spec.page_param.format(page=page)
+        results = self.parse(self.fetch(url))
+        logger.info("[HttpEngine] %s: %d products for '%s' (page %d)", self.spec.site, len(results), query, page)
+        return results
+
+    def fetch(self, url: str) -> str:
+        host = urlsplit(url).hostname or ""
+        proxy = None if host in NO_PROXY_HOSTS else self._proxy
+        try:
+            with phase(self.spec.site, "fetch"):
+                resp = _client(proxy).get(url, headers=self.spec.headers)
+            if resp.status_code in BLOCK_STATUS:
+                raise NeedsBrowser(f"{self.spec.site}: HTTP {resp.status_code}")
+            # Any other error status (a 502 or 404 from the proxy, a 500) also
+            # gets the browser fallback in auto mode.
+            resp.raise_for_status()
+        except httpx.HTTPError as err:
+            raise NeedsBrowser(f"{self.spec.site}: {err}") from err
+        html = resp.text
+        for marker in self.spec.block_markers:
+            if marker in html:
+                raise NeedsBrowser(f"{self.spec.site}: block page ({marker!r})")
+        return html
+
+    def parse(self, html: str) -> List[Dict[str, Any]]:
+        try:
+            raw = extract_html(html, self.spec.cards)
+        except LookupError as err:
+            # The results container is missing: layout change or JS shell.
+            raise NeedsBrowser(f"{self.spec.site}: '{err}' not in page") from err
+        return to_products(raw, self.spec.cards, self.spec.base_url)
@@ -1,18 +1,49 @@
 from __future__ import annotations
-from seleniumwire import webdriver  # must be seleniumwire
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
+from backend.scrapers.driver_pool import DriverProfile, get_pool
+from backend.scrapers.registry import register
+from backend.scrapers.lean import LeanProfile
+from backend.scrapers import config
+from backend.scrapers.extract import CardSpec, extract, price_rupees, to_products
+from backend.services.breaker import wait_budget
+from backend.services.metrics import phase
 from typing import List, Dict, Any
 import random
-import sys
-
-
+import time
+
+CONTAINER = "ol.ais-InfiniteHits-list"
+ITEM = "li.ais-InfiniteHits-item"
+MODAL_WAIT = 5  # fixed; the modal often never shows, so it stays out of the adaptive budget
+
+CARDS = CardSpec(
+    site="jiomart",
+    steps=((CONTAINER, 0, 1), (ITEM, 0, None)),
+    fields={
+        "title": ("div.plp-card-details-name", "textContent"),
+        "link": ("a", "href"),
+        "image": ("img", "src"),
+        "price": ("div.plp-card-details-price span", "textContent"),
+    },
+    parse_price=price_rupees,
+    limit=40,
+    required=("title", "link", "image", "price"),
+    key=r"/p/.*/(\d+)/?(?:[?#]|$)",
+)
+
+# Results are rendered by JavaScript (Algolia), so scripts, XHR and CSS stay
+# allowed; only media, fonts and trackers are dropped.
+LEAN = LeanProfile("jiomart")
+
+
+@register("jiomart")
 class JioMartScraper:
     def __init__(self, pincode: str = "400020") -> None:
         self.pincode = pincode
+        self._base_url = config.base_url("jiomart", "https://www.jiomart.com")
 
         ua = (
             f"Mozilla/5.0 (Linux; Android 10; SM-{random.randint(100,999)}F) "
@@ -42,69 +73,57 @@ class JioMartScraper:
                 }
             }
         )
+        LEAN.apply(self._opts)
+        self._pool = get_pool(DriverProfile(
+            "jiomart", self._opts, setup=LEAN.install, on_release=LEAN.report,
+        ))
 
     def search(self, query: str, hits: int = 40) -> List[Dict[str, Any]]:
-        drv = webdriver.Chrome(options=self._opts)
-        wait = WebDriverWait(drv, 20)
-
-        try:
-            drv.get("https://www.jiomart.com/")
-            drv.add_cookie({"name": "custPincode", "value": self.pincode})
-            drv.get(f"https://www.jiomart.com/search?q={query}")
+        return self.search_page(query, 1, hits)
 
-            # Close modal if it appears
-            try:
-                wait.until(EC.element_to_be_clickable(
-                    (By.CSS_SELECTOR, "button[data-testid='closeIcon']"))).click()
-            except TimeoutException:
-                pass
+    def search_page(self, query: str, page: int, hits: int = 40) -> List[Dict[str, Any]]:
+        """Page ``n`` is the ``n``-th batch of ``hits`` from the infinite list."""
+        with self._pool.lease() as drv:
+            return self._search(drv, query, hits, page)
 
-            container = wait.until(EC.presence_of_element_located(
-                (By.CSS_SELECTOR, "ol.ais-InfiniteHits-list")))
-
-            product_items = container.find_elements(
-                By.CSS_SELECTOR, "li.ais-InfiniteHits-item")[:hits]
-
-            return self._parse(product_items)
+    def _search(self, drv, query: str, hits: int, page: int = 1) -> List[Dict[str, Any]]:
+        with phase("jiomart", "navigate"):
+            drv.get(f"{self._base_url}/")
+            drv.add_cookie({"name": "custPincode", "value": self.pincode})
+            drv.get(f"{self._base_url}/search?q={query}")
 
+        # Close modal if it appears
+        try:
+            WebDriverWait(drv, MODAL_WAIT).until(EC.element_to_be_clickable(
+                (By.CSS_SELECTOR, "button[data-testid='closeIcon']"))).click()
         except TimeoutException:
-            return []
-
-        finally:
-            drv.quit()
-
-    def _parse(self, product_items) -> List[Dict[str, Any]]:
-        results = []
-
-        for it in product_items:
-            try:
-                title = it.find_element(
-                    By.CSS_SELECTOR, "div.plp-card-details-name"
-                ).get_attribute("textContent").strip()
-
-                price_el = it.find_element(
-                    By.CSS_SELECTOR, "div.plp-card-details-price span"
-                )
-                price_text = price_el.get_attribute("textContent").strip()
-                price = float(price_text.replace("₹", "").replace(",", "").strip())
-
-                img = it.find_element(By.CSS_SELECTOR, "img").get_attribute("src")
-                link = it.find_element(By.CSS_SELECTOR, "a").get_attribute("href")
-
-                results.append({
-                    "id": f"jiomart-{hash(title)}",
-                    "name": title,
-                    "price": price,
-                    "rating": 0.0,
-                    "reviews": 0,
-                    "imageUrl": img,
-                    "url": link,
-                    "site": "jiomart",
-                    "availability": "in-stock",
-                })
-
-            except Exception as err:
-                print(f"[Parse Error] {err}", file=sys.stderr)
-                continue
-
-        return results
\ No newline at end of file
+            pass
+
+        # A timeout here propagates: it counts against the breaker and is not
+        # cached as an empty result.
+        with phase("jiomart", "wait"), wait_budget("jiomart", 20) as timeout:
+            WebDriverWait(drv, timeout).until(EC.presence_of_element_located(
+                (By.CSS_SELECTOR, CONTAINER)))
+
+        if page > 1:
+            with phase("jiomart", "scroll"):
+                self._scroll(drv, page * hits, timeout)
+        return self._parse(drv, page * hits)[(page - 1) * hits:]
+
+    def _scroll(self, drv, want: int, timeout: float) -> None:
+        # Scroll until the list holds ``want`` cards or stops growing.
+        count = len(drv.find_elements(By.CSS_SELECTOR, ITEM))
+        while count < want:
+            drv.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                time.sleep(0.25)
+                grown = len(drv.find_elements(By.CSS_SELECTOR, ITEM))
+                if grown > count:
+                    break
+            else:
+                return
+            count = grown
+
+    def _parse(self, drv, hits: int) -> List[Dict[str, Any]]:
+        return to_products(extract(drv, CARDS, limit=hits), CARDS)
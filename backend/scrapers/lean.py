@@ -0,0 +1,169 @@
+from __future__ import annotations
+from dataclasses import dataclass, replace
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+from urllib.parse import urlsplit
+from backend.scrapers import config
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Third-party hosts no scraper needs; matched as a suffix of the request host.
+TRACKER_HOSTS: Tuple[str, ...] = (
+    "google-analytics.com", "googletagmanager.com", "googleadservices.com",
+    "doubleclick.net", "googlesyndication.com", "adservice.google.com",
+    "fonts.googleapis.com", "fonts.gstatic.com", "facebook.net", "facebook.com",
+    "hotjar.com", "clarity.ms", "criteo.com", "criteo.net", "moengage.com",
+    "branch.io", "nr-data.net", "newrelic.com", "amazon-adsystem.com",
+    "scorecardresearch.com", "taboola.com", "bing.com", "sentry.io",
+)
+
+# Sec-Fetch-Dest values (what Chrome says it is loading) -> our resource types.
+_DEST = {
+    "image": "image", "font": "font", "style": "stylesheet", "script": "script",
+    "video": "media", "audio": "media", "track": "media", "document": "document",
+    "iframe": "document", "empty": "xhr",
+}
+_EXT = {
+    "image": (".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", ".avif", ".ico"),
+    "font": (".woff", ".woff2", ".ttf", ".otf", ".eot"),
+    "media": (".mp4", ".webm", ".m3u8", ".mp3", ".m4s"),
+    "stylesheet": (".css",),
+    "script": (".js",),
+}
+
+
+def resource_type(url: str, headers: Any) -> str:
+    dest = (headers.get("Sec-Fetch-Dest") or "").lower()
+    if dest in _DEST:
+        return _DEST[dest]
+    path = urlsplit(url).path.lower()
+    for kind, exts in _EXT.items():
+        if path.endswith(exts):
+            return kind
+    accept = (headers.get("Accept") or "").lower()
+    if accept.startswith("image/"):
+        return "image"
+    if accept.startswith("text/css"):
+        return "stylesheet"
+    return "other"
+
+
+def _host_matches(host: str, patterns: Tuple[str, ...]) -> bool:
+    return any(host == p or host.endswith("." + p) for p in patterns)
+
+
+class _Counts:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.allowed = 0
+            self.allowed_bytes = 0
+            self.blocked: Dict[str, int] = {}
+
+    def allow(self) -> None:
+        with self._lock:
+            self.allowed += 1
+
+    def add_bytes(self, n: int) -> None:
+        with self._lock:
+            self.allowed_bytes += n
+
+    def block(self, kind: str) -> None:
+        with self._lock:
+            self.blocked[kind] = self.blocked.get(kind, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "allowed": self.allowed,
+                "allowed_bytes": self.allowed_bytes,
+                "blocked": sum(self.blocked.values()),
+                "blocked_by_type": dict(self.blocked),
+            }
+
+
+@dataclass(frozen=True)
+class LeanProfile:
+    """What a site's browser may skip while loading a results page.
+
+    Requests of ``block_types`` and requests to ``block_hosts`` are aborted.
+    If ``allowed_hosts`` is set it is the site's allowlist: every other host is
+    aborted too. Turned off with ``SCRAPER_LEAN=0`` (or ``SCRAPER_LEAN_<SITE>=0``).
+    """
+    site: str
+    block_types: FrozenSet[str] = frozenset({"image", "font", "media"})
+    block_hosts: Tuple[str, ...] = TRACKER_HOSTS
+    allowed_hosts: Optional[Tuple[str, ...]] = None
+
+    def for_base_url(self, base_url: str) -> "LeanProfile":
+        """This profile with ``base_url``'s host allowed too, for when
+        ``SCRAPER_BASE_URL_<SITE>`` points somewhere else (e.g. the fixture server)."""
+        host = urlsplit(base_url).hostname
+        if self.allowed_hosts is None or not host or _host_matches(host, self.allowed_hosts):
+            return self
+        return replace(self, allowed_hosts=self.allowed_hosts + (host,))
+
+    @property
+    def enabled(self) -> bool:
+        return config.site_env("SCRAPER_LEAN", self.site, "1") != "0"
+
+    def apply(self, options, seleniumwire_options: Optional[Dict[str, Any]] = None) -> None:
+        """Adjust launch options: eager page loads, no image decoding."""
+        if not self.enabled:
+            return
+        options.page_load_strategy = "eager"
+        if "image" in self.block_types:
+            prefs = options.experimental_options.get("prefs", {})
+            prefs.setdefault("profile.default_content_setting_values", {})["images"] = 2
+            options.add_experimental_option("prefs", prefs)
+        if seleniumwire_options and seleniumwire_options.get("exclude_hosts"):
+            # Excluded hosts bypass the interceptor; block them there instead.
+            seleniumwire_options["exclude_hosts"] = [
+                h for h in seleniumwire_options["exclude_hosts"]
+                if not _host_matches(h, self.block_hosts)
+            ]
+
+    def install(self, driver) -> None:
+        """Pool setup hook: abort unwanted requests and count the rest."""
+        if not self.enabled:
+            return
+        counts = driver.lean_counts = _Counts()
+
+        def on_request(request) -> None:
+            host = urlsplit(request.url).hostname or ""
+            if _host_matches(host, self.block_hosts):
+                counts.block("tracker")
+                request.abort()
+                return
+            if self.allowed_hosts is not None and not _host_matches(host, self.allowed_hosts):
+                counts.block("third-party")
+                request.abort()
+                return
+            kind = resource_type(request.url, request.headers)
+            if kind in self.block_types:
+                counts.block(kind)
+                request.abort()
+                return
+            counts.allow()
+
+        def on_response(request, response) -> None:
+            counts.add_bytes(len(response.body or b""))
+
+        driver.request_interceptor = on_request
+        driver.response_interceptor = on_response
+
+    def report(self, driver) -> None:
+        """Pool release hook: log this lease's traffic and reset the counters."""
+        counts = getattr(driver, "lean_counts", None)
+        if counts is None:
+            return
+        snap = counts.snapshot()
+        counts.reset()
+        logger.info(
+            "[lean] %s: allowed %d requests (%d bytes), blocked %d %s",
+            self.site, snap["allowed"], snap["allowed_bytes"], snap["blocked"], snap["blocked_by_type"],
+        )
@@ -0,0 +1,142 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional
+import importlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# site id -> zero-argument factory; scrapers are built on first lookup and kept
+# for the life of the process.
+_factories: Dict[str, Callable[[], Any]] = {}
+_instances: Dict[str, Any] = {}
+_errors: Dict[str, str] = {}
+# Re-entrant: importing a lazily registered module runs its @register while
+# get_scraper already holds the lock.
+_lock = threading.RLock()
+
+
+class _Lazy:
+    """Stands in for a scraper class until its module is first needed."""
+
+    def __init__(self, site_id: str, target: str, capabilities: Iterable[str]) -> None:
+        self.site_id = site_id
+        self.target = target  # "package.module:ClassName"
+        self.capabilities: FrozenSet[str] = frozenset(capabilities)
+
+    def resolve(self) -> Callable[[], Any]:
+        module, _, attr = self.target.partition(":")
+        factory = getattr(importlib.import_module(module), attr)
+        with _lock:
+            # The module's own @register normally did this already.
+            if _factories.get(self.site_id) is self:
+                _factories[self.site_id] = factory
+        return factory
+
+    def __call__(self) -> Any:
+        return self.resolve()()
+
+
+def register(site_id: str, factory: Optional[Callable[[], Any]] = None):
+    """Register a scraper factory under ``site_id``.
+
+    Usable directly (``register("amazon", AmazonScraper)``) or as a class
+    decorator (``@register("amazon")``).
+    """
+    def decorate(f: Callable[[], Any]):
+        with _lock:
+            _factories[site_id] = f
+            _instances.pop(site_id, None)
+            _errors.pop(site_id, None)
+        return f
+
+    if factory is not None:
+        return decorate(factory)
+    return decorate
+
+
+def register_lazy(site_id: str, target: str, capabilities: Iterable[str] = ("search",)) -> None:
+    """Register ``"module:Class"`` without importing it.
+
+    The module (and Selenium with it) is imported on the first
+    :func:`get_scraper` for the site. ``capabilities`` names the scraper
+    methods it implements, so :func:`supports` can answer before then.
+    """
+    with _lock:
+        if site_id not in _factories:
+            _factories[site_id] = _Lazy(site_id, target, capabilities)
+
+
+def get_scraper(site_id: str) -> Optional[Any]:
+    """Return the shared scraper for ``site_id``, or ``None`` if unknown.
+
+    Configuration problems (e.g. a missing API key) raise from here for the
+    requested site only, and are remembered for :func:`site_status`.
+    """
+    scraper = _instances.get(site_id)
+    if scraper is not None:
+        return scraper
+    with _lock:
+        scraper = _instances.get(site_id)
+        if scraper is not None:
+            return scraper
+        factory = _factories.get(site_id)
+        if factory is None:
+            return None
+        try:
+            scraper = factory()
+        except Exception as err:
+            _errors[site_id] = f"{type(err).__name__}: {err}"
+            raise
+        _errors.pop(site_id, None)
+        _instances[site_id] = scraper
+        return scraper
+
+
+def supports(site_id: str, method: str) -> bool:
+    """Whether the scraper registered for ``site_id`` implements ``method``.
+
+    Checked on the factory (normally the class), so nothing is built; for a
+    site not imported yet, the capabilities given to :func:`register_lazy`
+    answer instead. Never imports, so it is safe on the event loop.
+    """
+    factory = _factories.get(site_id)
+    if factory is None:
+        return False
+    if isinstance(factory, _Lazy):
+        return method in factory.capabilities
+    return callable(getattr(factory, method, None))
+
+
+def registered_sites() -> List[str]:
+    return sorted(_factories)
+
+
+def site_status() -> Dict[str, Dict[str, Any]]:
+    with _lock:
+        return {
+            site: {
+                "imported": not isinstance(_factories[site], _Lazy),
+                "loaded": site in _instances,
+                "error": _errors.get(site),
+            }
+            for site in sorted(_factories)
+        }
+
+
+def preload(sites: Iterable[str]) -> Dict[str, Optional[str]]:
+    """Build the scrapers for ``sites`` now; returns any error per site."""
+    out: Dict[str, Optional[str]] = {}
+    for site in sites:
+        try:
+            out[site] = None if get_scraper(site) is not None else "unknown site"
+        except Exception as err:
+            out[site] = f"{type(err).__name__}: {err}"
+    return out
+
+
+def reset() -> None:
+    """Drop all built scrapers so the next lookup rebuilds them."""
+    with _lock:
+        _instances.clear()
+        _errors.clear()
@@ -1,4 +1,4 @@
-from flipkart import FlipkartScraper  # Adjust import if needed
+from backend.scrapers.flipkart import FlipkartScraper  # run from the repo root: python -m backend.scrapers.test
 
 def main():
     scraper = FlipkartScraper()
@@ -0,0 +1,173 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from backend.scrapers.config import site_env
+from backend.services.search import SiteResult, merge_products, run_site
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Work units of all batches share one slot pool per site, so batches queue
+# behind each other (FIFO) instead of multiplying the load on a retailer.
+BATCH_CONCURRENCY = os.getenv("BATCH_CONCURRENCY", "2")  # per site; BATCH_CONCURRENCY_<SITE>
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "500"))
+BATCH_KEEP = int(os.getenv("BATCH_KEEP", "20"))  # finished batches kept for polling
+
+
+class Batch:
+    def __init__(self, queries: List[str], sites: List[str], fresh: bool = False) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.queries = list(dict.fromkeys(q.strip() for q in queries if q.strip()))
+        self.sites = list(dict.fromkeys(sites))
+        self.fresh = fresh
+        self.status = "running"  # running | done | cancelled
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.results: Dict[Tuple[str, str], SiteResult] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def total(self) -> int:
+        return len(self.queries) * len(self.sites)
+
+    def progress(self) -> Dict[str, Any]:
+        sites = {s: {"done": 0, "ok": 0, "total": len(self.queries)} for s in self.sites}
+        for (_, site), result in list(self.results.items()):
+            sites[site]["done"] += 1
+            sites[site]["ok"] += result.status == "ok"
+        return {"done": len(self.results), "total": self.total, "sites": sites}
+
+    def snapshot(self, products: bool = True) -> Dict[str, Any]:
+        """Progress plus whatever has finished so far, one entry per query."""
+        end = self.finished or time.time()
+        out: Dict[str, Any] = {
+            "id": self.id,
+            "status": self.status,
+            "created": self.created,
+            "elapsed_s": round(end - self.created, 3),
+            "progress": self.progress(),
+        }
+        results = []
+        for query in self.queries:
+            done = [self.results[(query, s)] for s in self.sites if (query, s) in self.results]
+            entry: Dict[str, Any] = {
+                "query": query,
+                "complete": len(done) == len(self.sites),
+                "sites": {r.site: r.summary() for r in done},
+            }
+            if products:
+                entry["products"] = merge_products(done)
+            results.append(entry)
+        out["results"] = results
+        return out
+
+
+class BatchScheduler:
+    """Runs batches of (query, site) units through the normal search path.
+
+    Each site drains its own queue with a fixed number of slots, so a slow or
+    throttled site never holds up the others. Units fresh in the cache are
+    answered first without taking a slot.
+    """
+
+    def __init__(
+        self,
+        make_call: Callable[[str], Callable[[str], Any]],
+        cache=None,
+        keep: int = BATCH_KEEP,
+        max_queries: int = BATCH_MAX_QUERIES,
+    ) -> None:
+        self._make_call = make_call
+        self._cache = cache
+        self.keep = keep
+        self.max_queries = max_queries
+        self._batches: "OrderedDict[str, Batch]" = OrderedDict()
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+
+    def submit(self, queries: List[str], sites: List[str], fresh: bool = False) -> Batch:
+        batch = Batch(queries, sites, fresh)
+        if not batch.queries or not batch.sites:
+            raise ValueError("at least one query and one site are required")
+        if len(batch.queries) > self.max_queries:
+            raise ValueError(f"at most {self.max_queries} queries per batch")
+        self._batches[batch.id] = batch
+        self._evict()
+        batch.task = asyncio.get_running_loop().create_task(self._run(batch))
+        return batch
+
+    def get(self, batch_id: str) -> Optional[Batch]:
+        return self._batches.get(batch_id)
+
+    def cancel(self, batch_id: str) -> Optional[Batch]:
+        batch = self._batches.get(batch_id)
+        if batch is not None and batch.task is not None and not batch.task.done():
+            batch.task.cancel()
+        return batch
+
+    async def stop(self) -> None:
+        tasks = [b.task for b in self._batches.values() if b.task and not b.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": {b.id: {"status": b.status, **b.progress()} for b in self._batches.values()},
+            "slots": {s: sem._value for s, sem in self._slots.items()},
+        }
+
+    # ------------------------------------- #
+    def _slot(self, site: str) -> asyncio.Semaphore:
+        sem = self._slots.get(site)
+        if sem is None:
+            limit = max(1, int(site_env("BATCH_CONCURRENCY", site, BATCH_CONCURRENCY)))
+            sem = self._slots[site] = asyncio.Semaphore(limit)
+        return sem
+
+    def _evict(self) -> None:
+        finished = [b.id for b in self._batches.values() if b.status != "running"]
+        while len(self._batches) > self.keep and finished:
+            self._batches.pop(finished.pop(0), None)
+
+    async def _run(self, batch: Batch) -> None:
+        try:
+            queued: Dict[str, List[str]] = {s: [] for s in batch.sites}
+            cached = []
+            # Fresh entries answer at once. Stale ones are scraped again in the
+            # site's slots like misses, rather than each starting a background
+            # refresh outside them.
+            for site in batch.sites:
+                for query in batch.queries:
+                    if not batch.fresh and self._cache is not None and self._cache.contains(query, site, fresh=True):
+                        cached.append((query, site))
+                    else:
+                        queued[site].append(query)
+            await asyncio.gather(*(self._unit(batch, q, s) for q, s in cached))
+            await asyncio.gather(*(self._drain(batch, s, qs) for s, qs in queued.items() if qs))
+            batch.status = "done"
+        except asyncio.CancelledError:
+            batch.status = "cancelled"
+            raise
+        finally:
+            batch.finished = time.time()
+            logger.info("[batch] %s %s: %d/%d units in %.1fs", batch.id, batch.status,
+                        len(batch.results), batch.total, batch.finished - batch.created)
+            self._evict()
+
+    async def _drain(self, batch: Batch, site: str, queries: List[str]) -> None:
+        sem = self._slot(site)
+
+        async def one(query: str) -> None:
+            async with sem:
+                await self._unit(batch, query, site, use_cache=False)
+
+        await asyncio.gather(*(one(q) for q in queries))
+
+    async def _unit(self, batch: Batch, query: str, site: str, use_cache: bool = True) -> None:
+        batch.results[(query, site)] = await run_site(
+            site, self._make_call(query), cache=self._cache, query=query, use_cache=use_cache,
+        )
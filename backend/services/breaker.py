@@ -0,0 +1,167 @@
+from __future__ import annotations
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Tuple
+from backend.scrapers.config import site_env
+import threading
+import time
+
+# Per-site resilience: a circuit breaker over recent scrape outcomes, and
+# WebDriverWait budgets derived from how long the page usually takes.
+# All settings can be overridden per site, e.g. BREAKER_FAILURES_CROMA=3.
+DEFAULTS = {
+    "BREAKER_FAILURES": "5",  # consecutive failures that open the circuit
+    "BREAKER_MIN_RATE": "0.5",  # ... or success rate below this over the window
+    "BREAKER_WINDOW": "50",  # recent scrapes kept for rates and percentiles
+    "BREAKER_COOLDOWN": "30",  # seconds before the first half-open probe
+    "BREAKER_MAX_COOLDOWN": "300",  # cap for the doubling cooldown
+    "WAIT_FACTOR": "2.0",  # wait budget = p95 of recent waits * factor
+    "WAIT_MIN": "3",  # never wait less than this
+}
+MIN_SAMPLES = 10
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def _p95(values) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class SiteHealth:
+    """Breaker state and latency windows for one site. Thread-safe."""
+
+    def __init__(self, site: str) -> None:
+        self.site = site
+
+        def setting(name: str) -> float:
+            return float(site_env(name, site, DEFAULTS[name]))
+
+        self.failures = int(setting("BREAKER_FAILURES"))
+        self.min_rate = setting("BREAKER_MIN_RATE")
+        self.cooldown = setting("BREAKER_COOLDOWN")
+        self.max_cooldown = setting("BREAKER_MAX_COOLDOWN")
+        self.wait_factor = setting("WAIT_FACTOR")
+        self.wait_min = setting("WAIT_MIN")
+        window = int(setting("BREAKER_WINDOW"))
+
+        self.state = CLOSED
+        self._outcomes: Deque[Tuple[bool, float]] = deque(maxlen=window)
+        self._waits: Deque[float] = deque(maxlen=window)
+        self._consecutive = 0
+        self._trips = 0
+        self._opened_at = 0.0
+        self._probe_at = 0.0  # when the current half-open probe was let through
+        self._lock = threading.Lock()
+
+    # ------------------------------------- #
+    def allow(self) -> bool:
+        """Whether a scrape may run now. In half-open, one probe at a time."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now - self._opened_at < self._current_cooldown():
+                    return False
+                self.state = HALF_OPEN
+            elif now - self._probe_at < self.cooldown:
+                return False  # a probe is already out
+            self._probe_at = now
+            return True
+
+    def record(self, ok: bool, elapsed: float) -> None:
+        with self._lock:
+            self._outcomes.append((ok, elapsed))
+            if ok:
+                self._consecutive = 0
+                if self.state != CLOSED:
+                    self.state = CLOSED
+                    self._trips = 0
+                return
+            self._consecutive += 1
+            if self.state == HALF_OPEN or self._should_open():
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+                self._trips += 1
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self._current_cooldown() - time.monotonic())
+
+    def _should_open(self) -> bool:
+        if self._consecutive >= self.failures:
+            return True
+        if len(self._outcomes) < MIN_SAMPLES:
+            return False
+        return sum(ok for ok, _ in self._outcomes) / len(self._outcomes) < self.min_rate
+
+    def _current_cooldown(self) -> float:
+        return min(self.max_cooldown, self.cooldown * 2 ** max(0, self._trips - 1))
+
+    # ------------------------------------- #
+    def wait_timeout(self, default: float) -> float:
+        """WebDriverWait budget: p95 of recent successful waits, scaled."""
+        with self._lock:
+            if len(self._waits) < MIN_SAMPLES:
+                return default
+            budget = _p95(self._waits) * self.wait_factor
+        return max(self.wait_min, min(default, budget))
+
+    def observe_wait(self, elapsed: float) -> None:
+        with self._lock:
+            self._waits.append(elapsed)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            outcomes = list(self._outcomes)
+            waits = list(self._waits)
+            state = self.state
+        ok = [elapsed for success, elapsed in outcomes if success]
+        return {
+            "state": state,
+            "retry_in_s": round(self.retry_in(), 1),
+            "samples": len(outcomes),
+            "success_rate": round(len(ok) / len(outcomes), 3) if outcomes else None,
+            "consecutive_failures": self._consecutive,
+            "p50_s": round(sorted(ok)[len(ok) // 2], 3) if ok else None,
+            "p95_s": round(_p95(ok), 3) if ok else None,
+            "wait_p95_s": round(_p95(waits), 3) if waits else None,
+        }
+
+
+class Breakers:
+    def __init__(self) -> None:
+        self._sites: Dict[str, SiteHealth] = {}
+        self._lock = threading.Lock()
+
+    def get(self, site: str) -> SiteHealth:
+        with self._lock:
+            health = self._sites.get(site)
+            if health is None:
+                health = self._sites[site] = SiteHealth(site)
+            return health
+
+    def stats(self, sites: List[str] = ()) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            known = dict(self._sites)
+        return {s: (known[s].snapshot() if s in known else self.get(s).snapshot())
+                for s in sorted(set(known) | set(sites))}
+
+
+breakers = Breakers()
+
+
+@contextmanager
+def wait_budget(site: str, default: float) -> Iterator[float]:
+    """Yield the adaptive WebDriverWait timeout for ``site``.
+
+    Only waits that finish without raising feed the window, so a page that
+    stopped rendering cannot drag the budget up to the default.
+    """
+    health = breakers.get(site)
+    started = time.monotonic()
+    yield health.wait_timeout(default)
+    health.observe_wait(time.monotonic() - started)
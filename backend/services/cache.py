@@ -0,0 +1,209 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+from backend.scrapers.config import site_env
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1000"))
+CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))
+# How long past its TTL an entry may still be served while it is refreshed.
+CACHE_STALE_TTL = float(os.getenv("CACHE_STALE_TTL", "3600"))
+CACHE_PATH = os.getenv("CACHE_PATH", str(Path(__file__).resolve().parents[1] / ".cache" / "results.sqlite3"))
+
+Key = Tuple[str, str]
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+@dataclass
+class _Entry:
+    value: List[Dict[str, Any]]
+    stored_at: float
+    # Derived orderings of ``value`` (e.g. sorted by price), built on demand
+    # and dropped with the entry.
+    views: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+
+
+class _DiskStore:
+    """Write-through SQLite copy of the cache so it survives restarts."""
+
+    def __init__(self, path: str, max_age: float) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " query TEXT NOT NULL, site TEXT NOT NULL, stored_at REAL NOT NULL, value TEXT NOT NULL,"
+            " PRIMARY KEY (query, site))"
+        )
+        self._lock = threading.Lock()
+        self._max_age = max_age
+        self._writes = 0
+
+    def get(self, key: Key) -> Optional[_Entry]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT stored_at, value FROM results WHERE query = ? AND site = ?", key
+            ).fetchone()
+        if row is None:
+            return None
+        return _Entry(json.loads(row[1]), row[0])
+
+    def put(self, key: Key, entry: _Entry) -> None:
+        payload = json.dumps(entry.value, separators=(",", ":"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (*key, entry.stored_at, payload),
+            )
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._db.execute(
+                    "DELETE FROM results WHERE stored_at < ?", (time.time() - self._max_age,)
+                )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM results")
+
+
+class ResultCache:
+    """LRU cache of per-site search results keyed on (normalized query, site).
+
+    Entries are fresh for the site's TTL (``CACHE_TTL_<SITE>``, else
+    ``CACHE_TTL``). After that they are still returned, marked stale, for up
+    to ``CACHE_STALE_TTL`` seconds so the caller can refresh in the background.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        ttl: float = CACHE_TTL,
+        stale_ttl: float = CACHE_STALE_TTL,
+        path: Optional[str] = CACHE_PATH,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[Key, _Entry]" = OrderedDict()
+        self._refreshing: Set[Key] = set()
+        self._lock = threading.Lock()
+        self._disk = _DiskStore(path, ttl + stale_ttl) if path else None
+        self._stats = {"hits": 0, "stale": 0, "misses": 0, "disk_hits": 0, "evictions": 0, "refreshes": 0}
+
+    def site_ttl(self, site: str) -> float:
+        return float(site_env("CACHE_TTL", site, str(self.ttl)))
+
+    # ------------------------------------- #
+    def get(self, query: str, site: str) -> Optional[Tuple[List[Dict[str, Any]], bool, Dict[str, Any]]]:
+        """Return ``(products, fresh, views)`` or ``None`` on a miss.
+
+        ``views`` is a per-entry dict callers may use to keep derived
+        orderings of ``products`` for as long as the entry lives.
+        """
+        key = (normalize_query(query), site)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None and self._disk is not None:
+            entry = self._disk.get(key)
+            if entry is not None:
+                self._count("disk_hits")
+                self._remember(key, entry)
+
+        age = time.time() - entry.stored_at if entry else None
+        ttl = self.site_ttl(site)
+        if entry is None or age > ttl + self.stale_ttl:
+            self._count("misses")
+            return None
+        if age > ttl:
+            self._count("stale")
+            return entry.value, False, entry.views
+        self._count("hits")
+        return entry.value, True, entry.views
+
+    def contains(self, query: str, site: str, fresh: bool = False) -> bool:
+        """Whether :meth:`get` would return an entry (only a fresh one with
+        ``fresh``), without counting a hit or miss; for schedulers deciding
+        what to scrape."""
+        key = (normalize_query(query), site)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None and self._disk is not None:
+            entry = self._disk.get(key)
+            if entry is not None:
+                self._remember(key, entry)
+        if entry is None:
+            return False
+        return time.time() - entry.stored_at <= self.site_ttl(site) + (0 if fresh else self.stale_ttl)
+
+    def set(self, query: str, site: str, products: List[Dict[str, Any]], disk: bool = True) -> None:
+        """Store ``products``; ``disk=False`` fills the in-memory layer only,
+        for results another process has already written to disk."""
+        key = (normalize_query(query), site)
+        entry = _Entry(list(products), time.time())
+        self._remember(key, entry)
+        if disk and self._disk is not None:
+            try:
+                self._disk.put(key, entry)
+            except sqlite3.Error as err:
+                logger.warning("[cache] disk write failed: %s", err)
+
+    def begin_refresh(self, query: str, site: str) -> bool:
+        """Claim the background refresh for a stale key; False if one is running."""
+        key = (normalize_query(query), site)
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self._stats["refreshes"] += 1
+            return True
+
+    def end_refresh(self, query: str, site: str) -> None:
+        with self._lock:
+            self._refreshing.discard((normalize_query(query), site))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["stale"] + self._stats["misses"]
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "refreshing": len(self._refreshing),
+                "hit_ratio": round((self._stats["hits"] + self._stats["stale"]) / lookups, 3) if lookups else 0.0,
+                **self._stats,
+            }
+
+    # ------------------------------------- #
+    def _remember(self, key: Key, entry: _Entry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+
+result_cache = ResultCache()
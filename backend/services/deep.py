@@ -0,0 +1,210 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from backend.scrapers.registry import registered_sites
+from backend.services.breaker import CLOSED, breakers
+from backend.services.cache import normalize_query
+from backend.services.ratelimit import rate_limits
+from backend.services.search import run_site
+import asyncio
+import base64
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Result pages after the first. /api/search scrapes page 1 as before; page 2
+# of every site that can page is then prefetched in the background, and each
+# page fetched through /api/search/more prefetches the one after it. Pages
+# nobody asks for are not followed, and a site whose prefetched pages are
+# rarely read stops being prefetched on its own.
+PREFETCH = os.getenv("PREFETCH", "1").lower() not in ("0", "false", "no", "off")
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "1"))  # background scrapes at once, all sites
+PREFETCH_MAX_DEPTH = int(os.getenv("PREFETCH_MAX_DEPTH", "5"))  # deepest page served
+PREFETCH_MAX_PENDING = int(os.getenv("PREFETCH_MAX_PENDING", "32"))  # queued beyond this are dropped
+PREFETCH_MIN_USE = float(os.getenv("PREFETCH_MIN_USE", "0.1"))  # pause a site's page-2 prefetch below this
+PREFETCH_WARMUP = int(os.getenv("PREFETCH_WARMUP", "20"))  # prefetches before the use rate counts
+PREFETCH_KEEP = float(os.getenv("PREFETCH_KEEP", "900"))  # seconds a prefetched page waits to be read
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+def page_key(query: str, page: int) -> str:
+    """Cache and single-flight key for one result page of ``query``."""
+    return query if page <= 1 else f"{query} #p{page}"
+
+
+def encode_token(query: str, sites: List[str], page: int) -> str:
+    raw = json.dumps({"q": query, "s": sites, "p": page}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_token(token: str) -> Tuple[str, List[str], int]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = json.loads(raw)
+        query, sites, page = str(data["q"]), [str(s) for s in data["s"]], int(data["p"])
+    except (ValueError, KeyError, TypeError) as err:
+        raise InvalidToken("malformed continuation token") from err
+    if not query or not sites or not 2 <= page <= PREFETCH_MAX_DEPTH:
+        raise InvalidToken("continuation token out of range")
+    unknown = set(sites) - set(registered_sites())
+    if unknown:
+        raise InvalidToken(f"continuation token names unknown sites: {', '.join(sorted(unknown))}")
+    return query, sites, page
+
+
+class Prefetcher:
+    """Low-priority background scrapes of the next result page.
+
+    Prefetches share ``concurrency`` slots across all sites and are skipped
+    while a site's breaker is not closed or its rate limit has no spare token,
+    so they never queue ahead of a user's own search.
+    """
+
+    def __init__(
+        self,
+        make_call: Callable[[str, int], Callable[[str], Any]],
+        cache=None,
+        concurrency: int = PREFETCH_CONCURRENCY,
+        max_depth: int = PREFETCH_MAX_DEPTH,
+        enabled: bool = PREFETCH,
+    ) -> None:
+        self._make_call = make_call
+        self._cache = cache
+        self.concurrency = max(1, concurrency)
+        self.max_depth = max_depth
+        self.enabled = enabled
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._pending: Set[Tuple[str, str, int]] = set()
+        # (query, site, page) prefetched and not read yet -> when it landed.
+        self._unread: "OrderedDict[Tuple[str, str, int], float]" = OrderedDict()
+        self._read_early: Set[Tuple[str, str, int]] = set()  # read while still being fetched
+        self._sites: Dict[str, Dict[str, int]] = {}
+
+    def schedule(self, query: str, sites: List[str], page: int, auto: bool = False) -> None:
+        """Prefetch ``page`` for each site. ``auto`` marks the speculative
+        page-2 fetch after a plain search, which a site's use rate can veto."""
+        if not self.enabled or page > self.max_depth:
+            return
+        loop = asyncio.get_running_loop()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        for site in sites:
+            key = (normalize_query(query), site, page)
+            counts = self._counts(site)
+            if key in self._pending or key in self._unread:
+                continue
+            if auto and not self.useful(site):
+                counts["paused"] += 1
+                continue
+            if len(self._pending) >= PREFETCH_MAX_PENDING:
+                counts["dropped"] += 1
+                continue
+            if self._cache is not None and self._cache.contains(page_key(query, page), site):
+                continue
+            self._pending.add(key)
+            task = loop.create_task(self._fetch(key, query, site, page))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def consumed(self, query: str, site: str, page: int) -> None:
+        """A client read ``page``; count it as used whether or not it was
+        prefetched, so a paused site picks up again once people page."""
+        counts = self._counts(site)
+        key = (normalize_query(query), site, page)
+        if self._unread.pop(key, None) is not None:
+            counts["used"] += 1
+        elif key in self._pending:
+            self._read_early.add(key)
+            counts["used"] += 1
+        else:
+            # Not prefetched, but it would have been read had it been.
+            counts["issued"] += 1
+            counts["used"] += 1
+            counts["demand"] += 1
+        self._decay(counts)
+
+    def useful(self, site: str) -> bool:
+        counts = self._counts(site)
+        if counts["issued"] < PREFETCH_WARMUP:
+            return True
+        return counts["used"] / counts["issued"] >= PREFETCH_MIN_USE
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        self._expire()
+        sites = {}
+        for site, counts in sorted(self._sites.items()):
+            issued = counts["issued"]
+            sites[site] = {
+                **counts,
+                "use_rate": round(counts["used"] / issued, 3) if issued else None,
+                "auto": self.useful(site),
+            }
+        return {
+            "enabled": self.enabled,
+            "pending": len(self._pending),
+            "unread": len(self._unread),
+            "sites": sites,
+        }
+
+    # ------------------------------------- #
+    def _counts(self, site: str) -> Dict[str, int]:
+        counts = self._sites.get(site)
+        if counts is None:
+            counts = self._sites[site] = {
+                "issued": 0, "used": 0, "demand": 0, "skipped": 0, "paused": 0, "dropped": 0, "failed": 0,
+            }
+        return counts
+
+    @staticmethod
+    def _decay(counts: Dict[str, int]) -> None:
+        # Halve the tallies now and then so the use rate follows recent traffic.
+        if counts["issued"] >= 10 * PREFETCH_WARMUP:
+            counts["issued"] //= 2
+            counts["used"] //= 2
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - PREFETCH_KEEP
+        while self._unread and next(iter(self._unread.values())) < cutoff:
+            self._unread.popitem(last=False)
+
+    def _idle(self, site: str) -> bool:
+        if breakers.get(site).state != CLOSED:
+            return False
+        bucket = rate_limits.bucket(site)
+        return bucket is None or bucket.stats()["tokens"] >= 1
+
+    async def _fetch(self, key: Tuple[str, str, int], query: str, site: str, page: int) -> None:
+        counts = self._counts(site)
+        try:
+            async with self._slots:
+                if not self._idle(site):
+                    counts["skipped"] += 1
+                    return
+                counts["issued"] += 1
+                self._decay(counts)
+                result = await run_site(
+                    site, self._make_call(query, page), cache=self._cache, query=page_key(query, page),
+                )
+            if result.status == "ok" and key not in self._read_early:
+                self._expire()
+                self._unread[key] = time.monotonic()
+            elif result.status != "ok":
+                counts["failed"] += 1
+            logger.info("[prefetch] '%s' page %d on %s: %s, %d products",
+                        query, page, site, result.status, len(result.products))
+        finally:
+            self._pending.discard(key)
+            self._read_early.discard(key)
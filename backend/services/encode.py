@@ -0,0 +1,59 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Mapping, Optional
+from fastapi import Response
+from backend.models.product import PRODUCT_FIELDS, ProductRow
+import orjson
+import os
+
+# Product lists leave the API through here instead of FastAPI's response_model
+# path: rows are validated once when scraped (extract.to_products), so they
+# are written straight out with orjson. response_model stays on the routes
+# for the OpenAPI schema only.
+FORMATS = ("rows", "columns")
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "4096"))  # gzip responses at least this big
+COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+
+# Columns with few distinct values are sent as indices into a dictionary.
+DICTIONARY_FIELDS = ("site", "availability")
+
+
+def to_columns(products: List[ProductRow]) -> Dict[str, Any]:
+    """``format=columns``: one array per field instead of one object per product.
+
+    ``site`` and ``availability`` hold indices into ``dictionaries``::
+
+        {"count": 2, "fields": ["id", ...],
+         "columns": {"id": ["a", "b"], ..., "site": [0, 0]},
+         "dictionaries": {"site": ["amazon"], "availability": ["in-stock"]}}
+    """
+    columns: Dict[str, List[Any]] = {}
+    dictionaries: Dict[str, List[str]] = {}
+    for name in PRODUCT_FIELDS:
+        if name in DICTIONARY_FIELDS:
+            index: Dict[str, int] = {}
+            columns[name] = [index.setdefault(p[name], len(index)) for p in products]
+            dictionaries[name] = list(index)
+        else:
+            columns[name] = [p[name] for p in products]
+    return {"count": len(products), "fields": list(PRODUCT_FIELDS), "columns": columns, "dictionaries": dictionaries}
+
+
+def encode_products(products: List[ProductRow], format: str = "rows") -> bytes:
+    return orjson.dumps(to_columns(products) if format == "columns" else products)
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content)
+
+
+class ProductsResponse(Response):
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        products: List[ProductRow],
+        format: str = "rows",
+        headers: Optional[Mapping[str, str]] = None,
+        status_code: int = 200,
+    ) -> None:
+        super().__init__(encode_products(products, format), status_code, headers)
@@ -0,0 +1,241 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from backend.services.search import run_site
+import asyncio
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PATH = os.getenv("HISTORY_PATH", str(Path(__file__).resolve().parents[1] / ".data" / "history.sqlite3"))
+HISTORY_BATCH = int(os.getenv("HISTORY_BATCH", "500"))
+HISTORY_FLUSH_INTERVAL = float(os.getenv("HISTORY_FLUSH_INTERVAL", "2"))
+# Watched queries: "iphone 15;laptop" on the sites in HISTORY_WATCH_SITES.
+HISTORY_WATCH = os.getenv("HISTORY_WATCH", "")
+HISTORY_WATCH_SITES = os.getenv("HISTORY_WATCH_SITES", "amazon,flipkart")
+HISTORY_WATCH_INTERVAL = float(os.getenv("HISTORY_WATCH_INTERVAL", "3600"))
+HISTORY_WATCH_RATE = float(os.getenv("HISTORY_WATCH_RATE", "6"))  # scrapes per minute
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    id INTEGER PRIMARY KEY,
+    site TEXT NOT NULL,
+    product_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    norm_name TEXT NOT NULL,
+    price REAL,
+    url TEXT,
+    observed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS obs_product ON observations (product_id, observed_at);
+CREATE INDEX IF NOT EXISTS obs_name ON observations (norm_name, site, observed_at);
+CREATE INDEX IF NOT EXISTS obs_site ON observations (site, observed_at);
+CREATE TABLE IF NOT EXISTS watches (
+    query TEXT NOT NULL,
+    site TEXT NOT NULL,
+    PRIMARY KEY (query, site)
+);
+"""
+
+_Row = Tuple[str, str, str, str, Optional[float], Optional[str], float]
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", name.lower()).split())
+
+
+class PriceHistory:
+    """Append-only log of every product observation.
+
+    :meth:`record` only enqueues; a writer thread inserts in batches of up to
+    ``HISTORY_BATCH`` rows, so the request path never waits on the disk.
+    """
+
+    def __init__(self, path: str = HISTORY_PATH) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[_Row]]" = queue.Queue()
+        self._written = 0
+        self._writer = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._writer.start()
+
+    # ------------------------------------- #
+    def record(self, products: List[Dict[str, Any]], observed_at: Optional[float] = None) -> None:
+        ts = observed_at or time.time()
+        for p in products:
+            name = p.get("name") or ""
+            self._queue.put((
+                p.get("site") or "", p.get("id") or "", name, normalize_name(name),
+                p.get("price"), p.get("url"), ts,
+            ))
+
+    def flush(self) -> None:
+        """Block until everything recorded so far is on disk."""
+        self._queue.join()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._writer.join(timeout=10)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            batch = [item]
+            deadline = time.monotonic() + HISTORY_FLUSH_INTERVAL
+            while len(batch) < HISTORY_BATCH:
+                try:
+                    nxt = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._queue.put(None)  # handled on the next outer iteration
+                    self._queue.task_done()
+                    break
+                batch.append(nxt)
+            try:
+                with self._lock, self._db:
+                    self._db.executemany(
+                        "INSERT INTO observations (site, product_id, name, norm_name, price, url, observed_at)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        batch,
+                    )
+                self._written += len(batch)
+            except sqlite3.Error as err:
+                logger.warning("[history] dropped %d observations: %s", len(batch), err)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    # ------------------------------------- #
+    def series(
+        self,
+        product_id: Optional[str] = None,
+        name: Optional[str] = None,
+        site: Optional[str] = None,
+        since: Optional[float] = None,
+        limit: int = 500,
+    ) -> Dict[str, Any]:
+        """Price points (oldest first) and min/max/latest for one product.
+
+        Look up by ``product_id``, or by ``name`` (normalized, optionally
+        narrowed to ``site``).
+        """
+        if product_id:
+            where, args = "product_id = ?", [product_id]
+        elif name:
+            where, args = "norm_name = ?", [normalize_name(name)]
+            if site:
+                where += " AND site = ?"
+                args.append(site)
+        else:
+            raise ValueError("product_id or name is required")
+        if since is not None:
+            where += " AND observed_at >= ?"
+            args.append(since)
+
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT site, price, observed_at FROM observations WHERE {where}"
+                " ORDER BY observed_at DESC LIMIT ?",
+                (*args, limit),
+            ).fetchall()
+            low, high, count = self._db.execute(
+                f"SELECT MIN(price), MAX(price), COUNT(*) FROM observations WHERE {where}", args
+            ).fetchone()
+        points = [{"site": s, "price": p, "observed_at": t} for s, p, t in reversed(rows)]
+        return {
+            "points": points,
+            "min": low,
+            "max": high,
+            "latest": points[-1] if points else None,
+            "count": count,
+        }
+
+    # ------------------------------------- #
+    def watches(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            return self._db.execute("SELECT query, site FROM watches ORDER BY query, site").fetchall()
+
+    def watch(self, query: str, site: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("INSERT OR IGNORE INTO watches VALUES (?, ?)", (" ".join(query.split()), site))
+
+    def unwatch(self, query: str, site: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM watches WHERE query = ? AND site = ?", (" ".join(query.split()), site))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"queued": self._queue.qsize(), "written": self._written}
+
+
+class WatchScheduler:
+    """Re-scrape every watched (query, site) each ``interval`` seconds.
+
+    Scrapes are spaced to at most ``rate`` per minute and go through the
+    normal search path, so they also refresh the result cache and are
+    coalesced with user requests for the same query.
+    """
+
+    def __init__(
+        self,
+        history: PriceHistory,
+        make_call: Callable[[str], Callable[[str], Any]],
+        interval: float = HISTORY_WATCH_INTERVAL,
+        rate: float = HISTORY_WATCH_RATE,
+        cache=None,
+    ) -> None:
+        self.history = history
+        self._make_call = make_call
+        self.interval = interval
+        self.rate = rate
+        self._cache = cache
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None and self.rate > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        gap = 60.0 / self.rate
+        while True:
+            started = time.monotonic()
+            watches = await asyncio.get_running_loop().run_in_executor(None, self.history.watches)
+            for query, site in watches:
+                result = await run_site(
+                    site, self._make_call(query), cache=self._cache, query=query, use_cache=False
+                )
+                logger.info("[history] refreshed '%s' on %s: %s", query, site, result.status)
+                await asyncio.sleep(gap)
+            await asyncio.sleep(max(gap, self.interval - (time.monotonic() - started)))
+
+
+def seed_watches(history: PriceHistory) -> None:
+    sites = [s.strip() for s in HISTORY_WATCH_SITES.split(",") if s.strip()]
+    for query in filter(None, (q.strip() for q in HISTORY_WATCH.split(";"))):
+        for site in sites:
+            history.watch(query, site)
+
+
+price_history = PriceHistory()
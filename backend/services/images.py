@@ -0,0 +1,62 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator
+import hashlib
+import os
+import tempfile
+
+# Largest accepted image. Requests whose Content-Length is over the limit (plus
+# room for the multipart framing) are refused before the body is read; one
+# sent without a length is parsed (and spooled by Starlette) first, then
+# refused by read_upload.
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(8 * 1024 * 1024)))
+IMAGE_MAX_REQUEST = IMAGE_MAX_BYTES + 64 * 1024
+_CHUNK = 64 * 1024
+_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp"}
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Image:
+    data: bytes
+    digest: str  # sha256 of the content; the cache key for the results
+    suffix: str = ".jpg"
+
+    @property
+    def query(self) -> str:
+        """Key for the result cache and single-flight, shared with text queries."""
+        return f"image:{self.digest}"
+
+    @contextmanager
+    def as_file(self) -> Iterator[str]:
+        """Write the image to a private temp file for as long as a browser needs a path."""
+        fd, path = tempfile.mkstemp(prefix="upload-", suffix=self.suffix)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(self.data)
+            yield path
+        finally:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+async def read_upload(file, limit: int = IMAGE_MAX_BYTES) -> Image:
+    """Read an ``UploadFile`` into memory, hashing as it streams in."""
+    digest = hashlib.sha256()
+    buf = bytearray()
+    while True:
+        chunk = await file.read(_CHUNK)
+        if not chunk:
+            break
+        if len(buf) + len(chunk) > limit:
+            raise ImageTooLarge(f"image larger than {limit} bytes")
+        buf += chunk
+        digest.update(chunk)
+    suffix = os.path.splitext(file.filename or "")[1].lower()
+    return Image(bytes(buf), digest.hexdigest(), suffix if suffix in _SUFFIXES else ".jpg")
@@ -0,0 +1,332 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from backend.services.cache import normalize_query
+from backend.services.ratelimit import rate_limits
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# SCRAPE_BACKEND=queue sends text scrapes to worker processes
+# (python -m backend.worker) through a SQLite job table instead of running
+# them in the API process. Workers on other machines need JOBS_PATH on a
+# shared volume.
+SCRAPE_BACKEND = os.getenv("SCRAPE_BACKEND", "inline").lower()
+JOBS_PATH = os.getenv("JOBS_PATH", str(Path(__file__).resolve().parents[1] / ".data" / "jobs.sqlite3"))
+JOBS_VISIBILITY = float(os.getenv("JOBS_VISIBILITY", "120"))  # seconds a claim is held
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "3"))
+JOBS_RETRY_DELAY = float(os.getenv("JOBS_RETRY_DELAY", "2"))  # doubled per attempt
+JOBS_KEEP = float(os.getenv("JOBS_KEEP", "86400"))  # finished jobs are pruned after this
+JOBS_WAIT = float(os.getenv("JOBS_WAIT", os.getenv("SEARCH_SITE_TIMEOUT", "45")))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    norm_query TEXT NOT NULL,
+    site TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    visible_at REAL NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    worker TEXT,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, visible_at, created);
+CREATE INDEX IF NOT EXISTS jobs_key ON jobs (norm_query, site, status);
+CREATE TABLE IF NOT EXISTS site_tokens (
+    site TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class JobFailed(RuntimeError):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    query: str
+    site: str
+    status: str
+    attempts: int
+    max_attempts: int
+    created: float
+    updated: float
+    worker: Optional[str] = None
+    result: Optional[List[Dict[str, Any]]] = None
+    error: Optional[str] = None
+
+    def public(self) -> Dict[str, Any]:
+        return {
+            "id": self.id, "query": self.query, "site": self.site, "status": self.status,
+            "attempts": self.attempts, "created": self.created, "updated": self.updated,
+            "error": self.error, "products": self.result,
+        }
+
+
+_COLUMNS = "id, query, site, status, attempts, max_attempts, created, updated, worker, result, error"
+
+
+def _job(row) -> Job:
+    job = Job(*row)
+    if job.result is not None:
+        job.result = json.loads(job.result)
+    return job
+
+
+class JobQueue:
+    """Durable (query, site) scrape jobs shared by API and worker processes.
+
+    A claimed job stays invisible for ``visibility`` seconds; if its worker
+    neither completes nor fails it by then (crash, hang), the next claim picks
+    it up again. Failures are retried with backoff up to ``max_attempts``.
+    Identical pending jobs are coalesced, across API processes too.
+
+    RATE_LIMIT_<SITE> is enforced here, with one token bucket per site in the
+    database shared by every worker: a site with no token left is passed over
+    at claim time and its jobs wait in the queue, not in a worker.
+    """
+
+    def __init__(self, path: str = JOBS_PATH, visibility: float = JOBS_VISIBILITY) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.visibility = visibility
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._claims = 0
+
+    # ------------------------------------- #
+    def enqueue(self, query: str, site: str, max_attempts: int = JOBS_MAX_ATTEMPTS) -> str:
+        now = time.time()
+        norm = normalize_query(query)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT id FROM jobs WHERE norm_query = ? AND site = ? AND status IN (?, ?)"
+                    " ORDER BY created LIMIT 1",
+                    (norm, site, QUEUED, RUNNING),
+                ).fetchone()
+                if row:
+                    job_id = row[0]
+                else:
+                    job_id = uuid.uuid4().hex
+                    self._db.execute(
+                        "INSERT INTO jobs (id, query, norm_query, site, status, max_attempts,"
+                        " visible_at, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (job_id, query, norm, site, QUEUED, max_attempts, now, now, now),
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return job_id
+
+    def claim(self, worker: str, sites: Optional[List[str]] = None) -> Optional[Job]:
+        """Take the oldest ready job, or one whose previous claim has expired,
+        from a site that is within its rate limit."""
+        now = time.time()
+        where = "status IN (?, ?) AND visible_at <= ?"
+        args: List[Any] = [QUEUED, RUNNING, now]
+        if sites:
+            where += f" AND site IN ({','.join('?' * len(sites))})"
+            args += sites
+        throttled: List[str] = []
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    skip = f" AND site NOT IN ({','.join('?' * len(throttled))})" if throttled else ""
+                    row = self._db.execute(
+                        f"SELECT {_COLUMNS} FROM jobs WHERE {where}{skip} ORDER BY created LIMIT 1",
+                        args + throttled,
+                    ).fetchone()
+                    if row is None:
+                        job = None
+                        break
+                    job = _job(row)
+                    if job.status == RUNNING and job.attempts >= job.max_attempts:
+                        self._db.execute(
+                            "UPDATE jobs SET status = ?, error = ?, updated = ? WHERE id = ?",
+                            (FAILED, f"visibility timeout after {job.attempts} attempts", now, job.id),
+                        )
+                        continue
+                    if not self._take_token(job.site, now):
+                        throttled.append(job.site)
+                        continue
+                    job.status, job.attempts, job.worker = RUNNING, job.attempts + 1, worker
+                    self._db.execute(
+                        "UPDATE jobs SET status = ?, attempts = ?, worker = ?, visible_at = ?, updated = ?"
+                        " WHERE id = ?",
+                        (RUNNING, job.attempts, worker, now + self.visibility, now, job.id),
+                    )
+                    break
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._claims += 1
+            if self._claims % 200 == 0:
+                self._prune()
+        return job
+
+    def complete(self, job_id: str, worker: str, products: List[Dict[str, Any]]) -> None:
+        # A worker whose claim expired may still finish first; its result is
+        # as good as any, so only a job that is already final is left alone.
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, worker = ?, updated = ?"
+                " WHERE id = ? AND status NOT IN (?, ?)",
+                (DONE, json.dumps(products, separators=(",", ":")), worker, time.time(), job_id, DONE, FAILED),
+            )
+
+    def fail(self, job_id: str, worker: str, error: str, retry: bool = True) -> None:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = ? AND worker = ?",
+                (job_id, RUNNING, worker),
+            ).fetchone()
+            if row is None:
+                return  # claim expired and was taken over
+            attempts, max_attempts = row
+            if retry and attempts < max_attempts:
+                delay = JOBS_RETRY_DELAY * 2 ** (attempts - 1)
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, error = ?, visible_at = ?, updated = ? WHERE id = ?",
+                    (QUEUED, error, now + delay, now, job_id),
+                )
+            else:
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, error = ?, updated = ? WHERE id = ?",
+                    (FAILED, error, now, job_id),
+                )
+
+    # ------------------------------------- #
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._db.execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job(row) if row else None
+
+    def finished(self, job_id: str) -> Optional[Job]:
+        """The job once it is done or failed, else None; KeyError if unknown."""
+        with self._lock:
+            status = self._db.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if status is None:
+            raise KeyError(job_id)
+        return self.get(job_id) if status[0] in (DONE, FAILED) else None
+
+    def wait(self, job_id: str, timeout: float = JOBS_WAIT) -> Job:
+        """Block until the job is done or failed; raises TimeoutError."""
+        deadline = time.monotonic() + timeout
+        delay = 0.02
+        while True:
+            job = self.finished(job_id)
+            if job is not None:
+                return job
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"job {job_id} not finished within {timeout:g}s")
+            time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+            delay = min(delay * 1.5, 0.25)
+
+    async def wait_async(self, job_id: str, timeout: float = JOBS_WAIT) -> Job:
+        """:meth:`wait` for the event loop: sleeps on the loop and only hops
+        to a thread for each short status query, so a waiting request holds
+        no thread and thousands of jobs can be outstanding."""
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + timeout
+        delay = 0.02
+        while True:
+            job = await loop.run_in_executor(None, self.finished, job_id)
+            if job is not None:
+                return job
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"job {job_id} not finished within {timeout:g}s")
+            await asyncio.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+            delay = min(delay * 1.5, 0.25)
+
+    def run(self, query: str, site: str, timeout: float = JOBS_WAIT) -> List[Dict[str, Any]]:
+        """Enqueue and wait: the queue-backed equivalent of ``scraper.search``."""
+        return _result(self.wait(self.enqueue(query, site), timeout))
+
+    async def run_async(self, query: str, site: str, timeout: float = JOBS_WAIT) -> List[Dict[str, Any]]:
+        job_id = await asyncio.get_running_loop().run_in_executor(None, self.enqueue, query, site)
+        return _result(await self.wait_async(job_id, timeout))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, site, COUNT(*) FROM jobs GROUP BY status, site").fetchall()
+            oldest = self._db.execute(
+                "SELECT MIN(created) FROM jobs WHERE status = ?", (QUEUED,)
+            ).fetchone()[0]
+        out: Dict[str, Any] = {"backend": SCRAPE_BACKEND, "by_status": {}, "by_site": {}}
+        for status, site, count in rows:
+            out["by_status"][status] = out["by_status"].get(status, 0) + count
+            out["by_site"].setdefault(site, {})[status] = count
+        out["oldest_queued_s"] = round(time.time() - oldest, 1) if oldest else None
+        return out
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _take_token(self, site: str, now: float) -> bool:
+        # Runs inside claim's transaction, so the check and the take are atomic
+        # across processes.
+        bucket = rate_limits.bucket(site)
+        if bucket is None:
+            return True
+        row = self._db.execute("SELECT tokens, updated FROM site_tokens WHERE site = ?", (site,)).fetchone()
+        tokens = bucket.burst if row is None else min(bucket.burst, row[0] + (now - row[1]) * bucket.rate)
+        if tokens < 1:
+            return False
+        self._db.execute(
+            "INSERT OR REPLACE INTO site_tokens (site, tokens, updated) VALUES (?, ?, ?)",
+            (site, tokens - 1, now),
+        )
+        return True
+
+    def _prune(self) -> None:
+        self._db.execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND updated < ?",
+            (DONE, FAILED, time.time() - JOBS_KEEP),
+        )
+
+
+def _result(job: Job) -> List[Dict[str, Any]]:
+    if job.status == FAILED:
+        raise JobFailed(job.error or "job failed")
+    return job.result or []
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def job_queue() -> JobQueue:
+    """The process-wide queue, opened on first use."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
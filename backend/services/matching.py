@@ -0,0 +1,175 @@
+from __future__ import annotations
+from collections import defaultdict
+from dataclasses import dataclass
+from itertools import combinations
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+import numpy as np
+import re
+
+MATCH_THRESHOLD = 0.55
+# Tokens in more listings than this are too common to seed a candidate pair
+# (they still count towards the similarity score). Listings with the same
+# brand and variant are always paired.
+MAX_SEED = 64
+MAX_SEED_SHARE = 0.2
+
+BRANDS = frozenset({
+    "acer", "apple", "asus", "boat", "bosch", "dell", "google", "haier", "hp", "iqoo",
+    "jbl", "lenovo", "lg", "mi", "motorola", "msi", "nokia", "nothing", "oneplus",
+    "oppo", "panasonic", "philips", "poco", "realme", "redmi", "samsung", "sony",
+    "tcl", "vivo", "whirlpool", "xiaomi",
+})
+# Words that vary between listings of the same product.
+NOISE = frozenset({
+    "a", "and", "for", "in", "of", "the", "to", "with", "new", "latest", "edition",
+    "black", "white", "blue", "green", "red", "grey", "gray", "silver", "gold",
+    "pink", "purple", "yellow", "titanium", "natural", "midnight", "starlight",
+    "graphite", "onyx", "violet", "mint", "cream", "lavender", "colour", "color",
+    "storage", "ram", "rom", "gb", "tb", "inch", "inches", "cm",
+})
+# Words that name a different model of the same line ("iPhone 15" vs
+# "iPhone 15 Pro"); like numbers, listings must agree on them to match.
+QUALIFIERS = frozenset({
+    "pro", "plus", "max", "ultra", "mini", "lite", "fe", "fold", "flip", "neo",
+    "prime", "air", "slim", "note", "edge", "fusion", "se",
+})
+
+_VARIANT = re.compile(r"(\d+(?:\.\d+)?)\s*(gb|tb|inch(?:es)?|in\b|\"|cm)")
+_TOKEN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_UNIT = {"inches": "in", "inch": "in", '"': "in"}
+# Numbered tokens that describe a spec or year, not the model ("5g", "50mp", "2024").
+_SPEC = re.compile(r"[45]g|20[12]\d|\d+(?:\.\d+)?(?:mp|mah|hz|w|mm|nm|k|p)")
+
+
+@dataclass(frozen=True)
+class Title:
+    tokens: FrozenSet[str]
+    brand: Optional[str]
+    # Storage / screen-size tokens such as "128gb" or "55in"; listings with
+    # different variants never match.
+    variant: FrozenSet[str]
+    # Model numbers and qualifiers such as {"15", "pro"} or {"s24", "ultra"};
+    # listings with different models never match.
+    model: FrozenSet[str]
+
+
+def parse_title(title: str) -> Title:
+    text = title.lower().replace("+", " plus ")
+    variant = frozenset(
+        f"{float(num):g}{_UNIT.get(unit, unit)}" for num, unit in _VARIANT.findall(text)
+    )
+    text = _VARIANT.sub(" ", text)
+    tokens = frozenset(t for t in _TOKEN.findall(text) if t not in NOISE)
+    brand = next((t for t in _TOKEN.findall(text) if t in BRANDS), None)
+    model = frozenset(
+        t for t in tokens
+        if t in QUALIFIERS or (any(c.isdigit() for c in t) and not _SPEC.fullmatch(t))
+    )
+    return Title(tokens | variant, brand, variant, model)
+
+
+def _has_price(p: Dict[str, Any]) -> bool:
+    return isinstance(p.get("price"), (int, float)) and p["price"] > 0
+
+
+def _candidates(titles: List[Title], sites: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    index: Dict[Any, List[int]] = defaultdict(list)
+    for i, t in enumerate(titles):
+        for tok in t.tokens:
+            index[tok].append(i)
+        if t.brand and t.variant:
+            index[(t.brand, t.variant)].append(i)
+    limit = max(MAX_SEED, int(len(titles) * MAX_SEED_SHARE))
+    pairs = set()
+    for key, postings in index.items():
+        if len(postings) > limit and not isinstance(key, tuple):
+            continue
+        for i, j in combinations(postings, 2):
+            if sites[i] != sites[j]:
+                pairs.add((i, j))
+    if not pairs:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+    arr = np.fromiter((x for p in pairs for x in p), dtype=np.intp, count=2 * len(pairs))
+    return arr[0::2], arr[1::2]
+
+
+def _scores(titles: List[Title], left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    vocab: Dict[str, int] = {}
+    rows, cols = [], []
+    for i, t in enumerate(titles):
+        for tok in t.tokens:
+            rows.append(i)
+            cols.append(vocab.setdefault(tok, len(vocab)))
+    n = len(titles)
+    matrix = np.zeros((n, len(vocab)), dtype=np.float32)
+    matrix[rows, cols] = 1.0
+    idf = np.log((1 + n) / (1 + matrix.sum(axis=0))) + 1.0
+    matrix *= idf
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-9)
+    sim = matrix @ matrix.T  # cosine similarity of every listing pair in one BLAS call
+
+    scores = sim[left, right]
+    # Hard constraints, each applied when both listings state it: same brand,
+    # same storage/size variant, same model number and qualifiers.
+    clash = np.zeros(len(left), dtype=bool)
+    for key in ([t.brand for t in titles], [t.variant for t in titles], [t.model for t in titles]):
+        ids = {v: k for k, v in enumerate(set(key), start=1)}
+        col = np.array([ids[v] if v else 0 for v in key])
+        clash |= (col[left] != col[right]) & (col[left] > 0) & (col[right] > 0)
+    scores[clash] = 0.0
+    return scores
+
+
+def group_products(
+    products: List[Dict[str, Any]], threshold: float = MATCH_THRESHOLD
+) -> List[Dict[str, Any]]:
+    """Group listings of the same product across sites.
+
+    Each group holds at most one listing per site, offers sorted by price, and
+    the cheapest priced offer. Groups with more sites come first.
+    """
+    n = len(products)
+    titles = [parse_title(p.get("name") or "") for p in products]
+    sites = [p.get("site") or "" for p in products]
+    left, right = _candidates(titles, sites)
+
+    parent = list(range(n))
+    members: Dict[int, List[int]] = {i: [i] for i in range(n)}
+    group_sites: Dict[int, set] = {i: {sites[i]} for i in range(n)}
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    if len(left):
+        scores = _scores(titles, left, right)
+        keep = scores >= threshold
+        order = np.argsort(-scores[keep], kind="stable")
+        for i, j in zip(left[keep][order].tolist(), right[keep][order].tolist()):
+            a, b = find(i), find(j)
+            if a == b or group_sites[a] & group_sites[b]:
+                continue
+            parent[b] = a
+            members[a].extend(members.pop(b))
+            group_sites[a] |= group_sites.pop(b)
+
+    groups = []
+    for root, idx in members.items():
+        offers = sorted((products[i] for i in idx), key=lambda p: (not _has_price(p), p.get("price") or 0))
+        priced = [p for p in offers if _has_price(p)]
+        groups.append({
+            # Stable across requests whatever the prices do.
+            "id": min((products[i]["id"] for i in idx if products[i].get("id")), default=str(min(idx))),
+            "name": min((products[i].get("name") or "" for i in idx), key=len),
+            "brand": titles[root].brand,
+            "sites": sorted({sites[i] for i in idx}),
+            "offers": offers,
+            "cheapest": priced[0] if priced else None,
+            "minPrice": priced[0]["price"] if priced else None,
+            "maxPrice": priced[-1]["price"] if priced else None,
+        })
+    groups.sort(key=lambda g: (-len(g["sites"]), g["minPrice"] is None, g["minPrice"] or 0))
+    return groups
@@ -0,0 +1,157 @@
+from __future__ import annotations
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Tuple
+import logging
+import threading
+import time
+
+# In-process counters and histograms, rendered in the Prometheus text format
+# at /metrics. Each observation is a bisect plus a few additions under a lock,
+# cheap enough to leave on around every scrape phase.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 45.0, 90.0)
+
+# Set per HTTP request by the middleware in main; copied into scrape threads.
+request_id: ContextVar[str] = ContextVar("request_id", default="-")
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Labels, values: Labels, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Labels = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + amount
+
+    def expose(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.labels, k)} {v:g}" for k, v in items]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Labels = (), buckets=LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *values: str) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(values)
+            if series is None:
+                series = self._series[values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *values: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *values)
+
+    def expose(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(counts), total)) for k, (counts, total) in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total) in items:
+            running = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                running += n
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                extra = f'le="{le}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, extra)} {running}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {total:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {running}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List = []
+
+    def counter(self, name: str, help: str, labels: Labels = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Labels = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def expose(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines += metric.expose()
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+scrape_phase = registry.histogram(
+    "scrape_phase_seconds", "Time spent in one phase of a scrape.", ("site", "phase"),
+)
+scrape_cards = registry.counter(
+    "scrape_cards_total", "Result cards seen by the parser, by outcome.", ("site", "outcome"),
+)
+site_search = registry.histogram(
+    "search_site_seconds", "End-to-end time for one site within a search.",
+    ("site", "status", "cache"),
+)
+http_requests = registry.histogram(
+    "http_request_seconds", "API request latency, up to the response headers.",
+    ("method", "route", "status"),
+)
+
+
+@contextmanager
+def phase(site: str, name: str) -> Iterator[None]:
+    """Time one scrape phase (lease, navigate, wait, parse, fetch ...)."""
+    with scrape_phase.time(site, name):
+        yield
+
+
+# ------------------------------------- #
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get()
+        return True
+
+
+def configure_logging(level: int = logging.INFO) -> None:
+    """Root logging with the request id on every line, from any thread."""
+    logging.basicConfig(
+        level=level,
+        format="%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s",
+    )
+    for handler in logging.getLogger().handlers:
+        if not any(isinstance(f, RequestIdFilter) for f in handler.filters):
+            handler.addFilter(RequestIdFilter())
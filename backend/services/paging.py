@@ -0,0 +1,145 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from itertools import chain, islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from backend.services.search import SiteResult
+import base64
+import hashlib
+import heapq
+import json
+
+
+def _priced(p: Dict[str, Any]) -> bool:
+    return isinstance(p.get("price"), (int, float)) and p["price"] > 0
+
+
+# Unpriced listings always sort last.
+SORTS: Dict[str, Callable[[Dict[str, Any]], Tuple]] = {
+    "price-asc": lambda p: (not _priced(p), p["price"] if _priced(p) else 0.0),
+    "price-desc": lambda p: (not _priced(p), -p["price"] if _priced(p) else 0.0),
+    "rating-desc": lambda p: (-(p.get("rating") or 0.0), -(p.get("reviews") or 0)),
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+_ETAG_FIELDS = ("id", "name", "price", "rating", "reviews", "imageUrl", "url", "site", "availability")
+
+
+@dataclass
+class Page:
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str]
+    total: int
+    site_totals: Dict[str, int]
+
+    def etag(self, variant: str = "") -> str:
+        """Validator for the page body and its paging headers.
+
+        Digests the raw product fields directly, so an unchanged page can be
+        answered with 304 before anything is serialized. ``variant`` tells
+        apart encodings of the same page (``format=columns``). The tag is
+        weak because GZipMiddleware sends gzip and identity bodies under it.
+        """
+        h = hashlib.blake2b(digest_size=12)
+        h.update(variant.encode())
+        h.update(json.dumps([self.total, self.next_cursor, self.site_totals], sort_keys=True).encode())
+        for p in self.items:
+            h.update("\x1f".join(str(p.get(k)) for k in _ETAG_FIELDS).encode())
+            h.update(b"\x1e")
+        return f'W/"{h.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 weak comparison of ``etag`` against an If-None-Match header."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def fingerprint(*parts: Any) -> str:
+    """Short digest of the query shape a cursor belongs to."""
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.blake2b(raw.encode(), digest_size=6).hexdigest()
+
+
+def encode_cursor(offset: int, fp: str) -> str:
+    raw = json.dumps({"o": offset, "f": fp}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, fp: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        offset = int(data["o"])
+    except (ValueError, KeyError, TypeError) as err:
+        raise InvalidCursor("malformed cursor") from err
+    if data.get("f") != fp or offset < 0:
+        raise InvalidCursor("cursor does not belong to this search")
+    return offset
+
+
+def _sorted(result: SiteResult, sort: Optional[str]) -> List[Dict[str, Any]]:
+    # Each site's list is sorted once and memoized on the result (and, for
+    # cache hits, on the cache entry), so later pages only pay for the merge.
+    if sort is None:
+        return result.products
+    view = result.views.get(sort)
+    if view is None:
+        view = result.views[sort] = sorted(result.products, key=SORTS[sort])
+    return view
+
+
+def paginate(
+    results: List[SiteResult],
+    sort: Optional[str] = None,
+    sites: Optional[List[str]] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fp: str = "",
+) -> Page:
+    """Filter, order and slice the per-site results of one search.
+
+    Sorted output is a k-way merge of the per-site sorted lists; only as much
+    of the merge as the requested page needs is consumed.
+    """
+    def keep(p: Dict[str, Any]) -> bool:
+        if min_price is None and max_price is None:
+            return True
+        if not _priced(p):
+            return False
+        return (min_price is None or p["price"] >= min_price) and (
+            max_price is None or p["price"] <= max_price
+        )
+
+    per_site: List[List[Dict[str, Any]]] = []
+    site_totals: Dict[str, int] = {}
+    for r in results:
+        if sites and r.site not in sites:
+            continue
+        items = [p for p in _sorted(r, sort) if keep(p)]
+        site_totals[r.site] = len(items)
+        per_site.append(items)
+
+    merged: Iterator[Dict[str, Any]]
+    if sort is None:
+        merged = chain.from_iterable(per_site)
+    else:
+        merged = heapq.merge(*per_site, key=SORTS[sort])
+
+    offset = decode_cursor(cursor, fp) if cursor else 0
+    total = sum(site_totals.values())
+    if limit is None:
+        return Page(list(islice(merged, offset, None)), None, total, site_totals)
+    items = list(islice(merged, offset, offset + limit))
+    end = offset + len(items)
+    next_cursor = encode_cursor(end, fp) if end < total else None
+    return Page(items, next_cursor, total, site_totals)
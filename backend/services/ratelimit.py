@@ -0,0 +1,117 @@
+from __future__ import annotations
+from typing import Any, Dict, Optional
+from backend.scrapers.config import site_env
+import asyncio
+import threading
+import time
+
+# Per-site defaults; override with RATE_LIMIT_<SITE>=<requests>/<seconds> and
+# RATE_BURST_<SITE>. Sites without a limit are not throttled. Buckets here are
+# per process; with SCRAPE_BACKEND=queue the job queue applies the same limits
+# across all workers instead (JobQueue.claim).
+DEFAULT_LIMITS = {
+    "croma": "6/60",
+}
+DEFAULT_BURST = 3
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations in arrival order.
+
+    Each call takes a token immediately, letting the balance go negative, and
+    sleeps until its token would have been refilled. Callers are therefore
+    served first come, first served, and nobody waits unless the bucket is
+    actually empty. Safe to use from the event loop and from threads.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats = {"acquired": 0, "waited": 0, "wait_total": 0.0}
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self._stats["acquired"] += 1
+            if wait:
+                self._stats["waited"] += 1
+                self._stats["wait_total"] += wait
+            return wait
+
+    def _give_back(self) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+    async def acquire(self) -> float:
+        wait = self._reserve()
+        if wait:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self._give_back()
+                raise
+        return wait
+
+    def acquire_sync(self) -> float:
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tokens = min(self.burst, self._tokens + (time.monotonic() - self._updated) * self.rate)
+            return {
+                "rate_per_s": self.rate,
+                "burst": self.burst,
+                "tokens": round(tokens, 2),
+                "acquired": self._stats["acquired"],
+                "waited": self._stats["waited"],
+                "wait_total_s": round(self._stats["wait_total"], 3),
+            }
+
+
+class RateLimits:
+    def __init__(self) -> None:
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, site: str) -> Optional[TokenBucket]:
+        with self._lock:
+            if site not in self._buckets:
+                self._buckets[site] = self._build(site)
+            return self._buckets[site]
+
+    @staticmethod
+    def _build(site: str) -> Optional[TokenBucket]:
+        spec = site_env("RATE_LIMIT", site, DEFAULT_LIMITS.get(site))
+        if not spec:
+            return None
+        count, _, period = spec.partition("/")
+        rate = float(count) / float(period or 1)
+        burst = int(site_env("RATE_BURST", site, str(DEFAULT_BURST)))
+        return TokenBucket(rate, max(1, burst))
+
+    async def acquire(self, site: str) -> float:
+        """Wait for permission to hit ``site``; returns the seconds waited."""
+        bucket = self.bucket(site)
+        return await bucket.acquire() if bucket else 0.0
+
+    def acquire_sync(self, site: str) -> float:
+        bucket = self.bucket(site)
+        return bucket.acquire_sync() if bucket else 0.0
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            buckets = {s: b for s, b in self._buckets.items() if b is not None}
+        return {s: b.stats() for s, b in buckets.items()}
+
+
+rate_limits = RateLimits()
@@ -0,0 +1,248 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+from backend.scrapers.registry import registered_sites
+from backend.services.breaker import breakers
+from backend.services.cache import ResultCache, normalize_query
+from backend.services.metrics import site_search
+from backend.services.ratelimit import rate_limits
+from backend.services.singleflight import SingleFlight
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import time
+
+# The scrapers are blocking (Selenium), so every site runs on a worker thread.
+# A timed-out scrape cannot be interrupted; its thread finishes in the
+# background and the result is dropped.
+SITE_TIMEOUT = float(os.getenv("SEARCH_SITE_TIMEOUT", "45"))
+TOTAL_TIMEOUT = float(os.getenv("SEARCH_TOTAL_TIMEOUT", "60"))
+MAX_WORKERS = int(os.getenv("SEARCH_MAX_WORKERS", "8"))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="scrape")
+_background: Set[asyncio.Future] = set()
+# Identical (query, site) scrapes running at the same time share one execution.
+in_flight = SingleFlight()
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SiteResult:
+    site: str
+    status: str = "ok"  # ok | timeout | error | unknown | unsupported | open
+    products: List[Dict[str, Any]] = field(default_factory=list)
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    cache: Optional[str] = None  # hit | stale | miss, when a cache was consulted
+    shared: bool = False  # joined a scrape another request had already started
+    circuit: Optional[str] = None  # breaker state for the site: closed | open | half_open
+    # Memoized orderings of ``products``; shared with the cache entry on a hit.
+    views: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict, repr=False)
+
+    def summary(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "status": self.status,
+            "count": len(self.products),
+            "elapsed_ms": round(self.elapsed * 1000),
+        }
+        if self.cache:
+            out["cache"] = self.cache
+        if self.shared:
+            out["shared"] = True
+        if self.circuit:
+            out["circuit"] = self.circuit
+        if self.error:
+            out["error"] = self.error
+        return out
+
+
+def _storing(call, cache: ResultCache, query: str):
+    # Store from the worker thread, so a scrape that outlives its deadline
+    # still fills the cache for the next request.
+    if asyncio.iscoroutinefunction(call):
+        # Runs on the event loop. Remote calls are stored on disk by whoever
+        # ran them (the queue worker), so only the memory layer is filled.
+        async def run_async(site: str):
+            products = await call(site)
+            if products is not None:
+                cache.set(query, site, products, disk=False)
+            return products
+        return run_async
+
+    def run(site: str):
+        products = call(site)
+        if products is not None:
+            cache.set(query, site, products)
+        return products
+    return run
+
+
+async def _scrape(site: str, call, timeout: float = SITE_TIMEOUT):
+    # An async ``call`` hands the scrape to someone else (the job queue) and
+    # only waits on the loop; whoever fetches also throttles. Blocking calls
+    # run on a worker thread.
+    remote = asyncio.iscoroutinefunction(call)
+    if not remote:
+        # Throttle before the fetch, on the event loop, so waiting for a
+        # token holds neither a worker thread nor a browser.
+        await rate_limits.acquire(site)
+    # Every scrape reports to the site's breaker, including shared and
+    # background ones; a scrape slower than its deadline counts as a failure.
+    started = time.monotonic()
+    try:
+        if remote:
+            products = await call(site)
+        else:
+            # Carry the request id (and any other context) into the worker thread.
+            run = functools.partial(contextvars.copy_context().run, call, site)
+            products = await asyncio.get_running_loop().run_in_executor(_executor, run)
+    except Exception:
+        breakers.get(site).record(False, time.monotonic() - started)
+        raise
+    if products is not None:
+        elapsed = time.monotonic() - started
+        breakers.get(site).record(elapsed <= timeout, elapsed)
+    return products
+
+
+def _refresh(site: str, call, cache: ResultCache, query: str) -> None:
+    if not cache.begin_refresh(query, site):
+        return
+
+    async def run() -> None:
+        try:
+            await _scrape(site, call)
+        except Exception as err:
+            logger.warning("[search] background refresh of %s failed: %s", site, err)
+        finally:
+            cache.end_refresh(query, site)
+
+    fut = asyncio.ensure_future(run())
+    _background.add(fut)
+    fut.add_done_callback(_background.discard)
+
+
+async def run_site(
+    site: str,
+    call: Callable[[str], Optional[List[Dict[str, Any]]]],
+    timeout: float = SITE_TIMEOUT,
+    cache: Optional[ResultCache] = None,
+    query: Optional[str] = None,
+    use_cache: bool = True,
+) -> SiteResult:
+    if site not in registered_sites():
+        # Before any per-site state, so made-up names leave no breaker,
+        # rate limit or metric series behind.
+        return SiteResult(site, status="unknown", error="unsupported site")
+    started = time.monotonic()
+    health = breakers.get(site)
+    if cache is not None:
+        call = _storing(call, cache, query)
+        hit = cache.get(query, site) if use_cache else None
+        if hit is not None:
+            products, fresh, views = hit
+            # While the circuit is open, stale data is served without a refresh.
+            if not fresh and health.allow():
+                _refresh(site, call, cache, query)
+            result = SiteResult(
+                site, products=products, cache="hit" if fresh else "stale",
+                elapsed=time.monotonic() - started, views=views, circuit=health.state,
+            )
+            site_search.observe(result.elapsed, site, result.status, result.cache)
+            return result
+    if not health.allow():
+        result = SiteResult(
+            site, status="open", error=f"circuit open, retrying in {health.retry_in():.0f}s",
+            cache="miss" if cache is not None else None, circuit=health.state,
+        )
+        site_search.observe(0.0, site, result.status, result.cache or "none")
+        return result
+    shared = False
+    try:
+        if query is not None:
+            products, shared = await asyncio.wait_for(
+                in_flight.do((normalize_query(query), site), lambda: _scrape(site, call, timeout)),
+                timeout=timeout,
+            )
+        else:
+            products = await asyncio.wait_for(_scrape(site, call, timeout), timeout=timeout)
+    except asyncio.TimeoutError:
+        result = SiteResult(site, status="timeout", error=f"no response within {timeout:g}s")
+    except Exception as err:
+        logger.exception("[search] %s failed", site)
+        result = SiteResult(site, status="error", error=str(err) or type(err).__name__)
+    else:
+        if products is None:
+            result = SiteResult(site, status="unknown", error="unsupported site")
+        else:
+            result = SiteResult(site, products=list(products))
+    if cache is not None:
+        result.cache = "miss"
+    result.shared = shared
+    result.circuit = health.state
+    result.elapsed = time.monotonic() - started
+    site_search.observe(result.elapsed, site, result.status, result.cache or "none")
+    logger.info("[search] %s %s with %d results in %.2fs",
+                site, result.status, len(result.products), result.elapsed)
+    return result
+
+
+async def gather_sites(
+    sites: List[str],
+    call: Callable[[str], Optional[List[Dict[str, Any]]]],
+    site_timeout: float = SITE_TIMEOUT,
+    total_timeout: float = TOTAL_TIMEOUT,
+    cache: Optional[ResultCache] = None,
+    query: Optional[str] = None,
+    use_cache: bool = True,
+) -> List[SiteResult]:
+    """Run ``call(site)`` for every site concurrently, in request order.
+
+    ``call`` returns the site's products, or ``None`` if the site is unknown.
+    With a ``cache``, results are looked up and stored under ``query``;
+    ``use_cache=False`` skips the lookup but still stores the fresh result.
+    """
+    timeout = min(site_timeout, total_timeout)
+    unique = list(dict.fromkeys(sites))
+    return list(await asyncio.gather(
+        *(run_site(s, call, timeout, cache, query, use_cache) for s in unique)
+    ))
+
+
+async def iter_sites(
+    sites: List[str],
+    call: Callable[[str], Optional[List[Dict[str, Any]]]],
+    site_timeout: float = SITE_TIMEOUT,
+    total_timeout: float = TOTAL_TIMEOUT,
+    cache: Optional[ResultCache] = None,
+    query: Optional[str] = None,
+    use_cache: bool = True,
+) -> AsyncIterator[SiteResult]:
+    """Like :func:`gather_sites`, but yield each site as soon as it finishes."""
+    timeout = min(site_timeout, total_timeout)
+    tasks = [
+        asyncio.ensure_future(run_site(s, call, timeout, cache, query, use_cache))
+        for s in dict.fromkeys(sites)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Client went away: stop waiting (the worker threads finish on their own).
+        for task in tasks:
+            task.cancel()
+
+
+def merge_products(results: List[SiteResult]) -> List[Dict[str, Any]]:
+    out: List[Dict[str, Any]] = []
+    for r in results:
+        out.extend(r.products)
+    return out
+
+
+def status_header(results: List[SiteResult]) -> Dict[str, Dict[str, Any]]:
+    return {r.site: r.summary() for r in results}
@@ -0,0 +1,39 @@
+from __future__ import annotations
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+import asyncio
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution.
+
+    The first caller starts the work; callers arriving while it runs await the
+    same future and get the same result or exception. A caller that is
+    cancelled (client disconnect, deadline) only stops waiting: the shared work
+    keeps running for everyone else. Event-loop only, not thread-safe.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._stats = {"leaders": 0, "coalesced": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Return ``(result, shared)``; ``shared`` is True for coalesced callers."""
+        fut = self._inflight.get(key)
+        shared = fut is not None
+        if shared:
+            self._stats["coalesced"] += 1
+        else:
+            self._stats["leaders"] += 1
+            fut = asyncio.ensure_future(fn())
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda f: self._done(key, f))
+        return await asyncio.shield(fut), shared
+
+    def _done(self, key: Hashable, fut: asyncio.Future) -> None:
+        if self._inflight.get(key) is fut:
+            del self._inflight[key]
+        if not fut.cancelled():
+            fut.exception()  # mark retrieved even if every waiter gave up
+
+    def stats(self) -> Dict[str, Any]:
+        return {"inflight": len(self._inflight), **self._stats}
@@ -0,0 +1,112 @@
+"""Scrape worker processes for SCRAPE_BACKEND=queue.
+
+Each process claims (query, site) jobs from the SQLite job queue, runs the
+site's scraper with its own driver pool, and writes the products back. Sites
+are throttled at claim time (RATE_LIMIT_<SITE>, shared by all workers through
+the job database), and results are recorded in the result cache and price
+history. Jobs from POST /api/jobs never pass through the API's search path,
+so they are covered the same way.
+
+    python -m backend.worker                         # JOBS_WORKERS processes (default: CPU count)
+    python -m backend.worker --processes 4 --sites amazon flipkart
+"""
+from __future__ import annotations
+from typing import List, Optional
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+logger = logging.getLogger("backend.worker")
+
+# Adding workers does not raise a site's request rate: RATE_LIMIT_<SITE> is
+# one bucket in the job database, not one per process.
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "0")) or os.cpu_count() or 1
+JOBS_POLL = float(os.getenv("JOBS_POLL", "0.25"))  # max idle sleep between claims
+
+
+def work(index: int, sites: Optional[List[str]] = None) -> None:
+    # Imported here so each spawned process sets up its own scrapers and pools.
+    from backend.scrapers import get_scraper
+    from backend.scrapers.driver_pool import close_pools
+    from backend.services.cache import result_cache
+    from backend.services.history import price_history
+    from backend.services.jobs import job_queue
+    from backend.services.metrics import configure_logging
+
+    configure_logging()
+    name = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    queue = job_queue()
+    stopping = False
+
+    def stop(*_) -> None:
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logger.info("[worker] %s started (sites: %s)", name, ", ".join(sites or ["all"]))
+
+    idle = 0.05
+    try:
+        while not stopping:
+            job = queue.claim(name, sites)
+            if job is None:
+                time.sleep(idle)
+                idle = min(idle * 2, JOBS_POLL)
+                continue
+            idle = 0.05
+            started = time.monotonic()
+            try:
+                scraper = get_scraper(job.site)
+                if scraper is None:
+                    queue.fail(job.id, name, f"unknown site {job.site!r}", retry=False)
+                    continue
+                products = scraper.search(job.query)
+            except Exception as err:
+                logger.warning("[worker] %s on %s failed (attempt %d): %s",
+                               job.query, job.site, job.attempts, err)
+                queue.fail(job.id, name, f"{type(err).__name__}: {err}")
+                continue
+            queue.complete(job.id, name, products)
+            # The disk layer of the cache is shared, so API processes see it.
+            result_cache.set(job.query, job.site, products)
+            price_history.record(products)
+            logger.info("[worker] '%s' on %s: %d products in %.2fs",
+                        job.query, job.site, len(products), time.monotonic() - started)
+    finally:
+        close_pools()
+        queue.close()
+        price_history.close()
+        logger.info("[worker] %s stopped", name)
+
+
+def main(processes: int, sites: Optional[List[str]] = None) -> None:
+    if processes == 1:
+        work(0, sites)
+        return
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=work, args=(i, sites), name=f"scrape-worker-{i}") for i in range(processes)]
+    for p in procs:
+        p.start()
+
+    def forward(signum, _frame) -> None:
+        for p in procs:
+            if p.is_alive():
+                os.kill(p.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for p in procs:
+        p.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", type=int, default=JOBS_WORKERS)
+    parser.add_argument("--sites", nargs="+", help="only claim jobs for these sites")
+    args = parser.parse_args()
+    main(args.processes, args.sites)